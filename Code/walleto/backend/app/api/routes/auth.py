@@ -1,31 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import EmailStr
-from app.core.database import get_db
-from app.core.security import decode_access_token, verify_password, get_password_hash
-from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, UserUpdate, PasswordResetRequest, PasswordReset, PasswordChange
+from typing import List, Optional
+from app.core.database import get_db, get_async_db
+from app.core.security import decode_access_token
+from app.core.hashing import password_hasher
+from app.core.cache import principal_cache
+from app.core.etag import make_etag, check_etag
+from app.models.user import User
+from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, UserUpdate, PasswordResetRequest, PasswordReset, PasswordChange, Principal
 from app.schemas.otp import SignupVerifyRequest, SigninVerifyRequest
+from app.schemas.device import TrustedDeviceInfo
 from app.services.auth import (
-    create_user,
-    authenticate_user,
+    create_user_pooled,
+    authenticate_user_pooled,
+    check_signin_rate_limit,
     create_user_token,
     get_user_by_email,
+    get_user_by_id,
+    get_principal,
     update_user_profile,
-    reset_user_password,
+    reset_user_password_pooled,
 )
 from app.services.otp_service import create_otp, verify_otp
-from app.services.device_service import verify_trusted_device, create_trusted_device
+from app.services.device_service import verify_trusted_device, create_trusted_device, list_trusted_devices
+from app.services.avatar_service import get_avatar
+from app.core.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    """Get current authenticated user from token."""
+def _token_user_id(credentials: HTTPAuthorizationCredentials) -> str:
+    """Validate a bearer token and return its user_id claim."""
     token = credentials.credentials
     payload = decode_access_token(token)
 
@@ -35,14 +45,56 @@ def get_current_user(
             detail="Invalid or expired token"
         )
 
-    email = payload.get("sub")
-    if not email:
+    user_id = payload.get("user_id")
+    if not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload"
         )
 
-    user = get_user_by_email(db, email)
+    return user_id
+
+
+def _require_active(principal: Optional[Principal]) -> Principal:
+    if not principal:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is inactive"
+        )
+
+    return principal
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Get current authenticated user (id, email, is_active) from token."""
+    user_id = _token_user_id(credentials)
+    return _require_active(get_principal(db, user_id))
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Get current authenticated user from token, for handlers on AsyncSession."""
+    user_id = _token_user_id(credentials)
+    return _require_active(await db.run_sync(get_principal, user_id))
+
+
+def get_current_user_profile(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """Load the full user row, for the few handlers that need more than the principal."""
+    user = get_user_by_id(db, current_user.id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -55,25 +107,57 @@ def get_current_user(
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
 def signup(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
-    user = create_user(db, user_data)
+    user = create_user_pooled(db, user_data)
     access_token = create_user_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/signin", response_model=Token)
-def signin(credentials: UserLogin, db: Session = Depends(get_db)):
+def signin(credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
     """Authenticate user and return token."""
-    user = authenticate_user(db, credentials)
+    check_signin_rate_limit(credentials.email, request)
+    user = authenticate_user_pooled(db, credentials)
     access_token = create_user_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user = Depends(get_current_user)):
+def get_me(current_user: User = Depends(get_current_user_profile)):
     """Get current user profile."""
     return current_user
 
 
+@router.get("/me/avatar")
+def get_my_avatar(
+    request: Request,
+    size: str = Query("full", pattern="^(full|thumb)$"),
+    v: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the current user's profile picture, or its thumbnail with size=thumb.
+
+    Requests for the current version (v from avatar_url) may be cached
+    indefinitely; otherwise clients revalidate with If-None-Match.
+    """
+    avatar = get_avatar(db, current_user.id, thumbnail=size == "thumb")
+    if not avatar:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profile picture"
+        )
+
+    image, content_type, version = avatar
+    headers = check_etag(
+        request,
+        make_etag(version, size),
+        f"private, max-age={settings.AVATAR_CACHE_SECONDS}, immutable" if v == version else "private, no-cache"
+    )
+
+    return Response(content=image, media_type=content_type, headers=headers)
+
+
 @router.put("/me", response_model=UserResponse)
 def update_me(
     update_data: UserUpdate,
@@ -84,6 +168,15 @@ def update_me(
     return update_user_profile(db, current_user.id, update_data)
 
 
+@router.get("/devices", response_model=List[TrustedDeviceInfo])
+def get_trusted_devices(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List the current user's trusted devices."""
+    return list_trusted_devices(db, current_user.id)
+
+
 # OTP-based authentication endpoints
 
 @router.post("/signup/request-otp")
@@ -134,7 +227,7 @@ async def signup_verify(
     )
 
     # Create user
-    user = create_user(db, user_data)
+    user = await run_in_threadpool(create_user_pooled, db, user_data)
     access_token = create_user_token(user)
 
     return {"access_token": access_token, "token_type": "bearer"}
@@ -153,7 +246,8 @@ async def signin_request_otp(
     Otherwise, authenticates password and sends OTP for two-factor verification.
     """
     # Authenticate with password first
-    user = authenticate_user(db, credentials)
+    check_signin_rate_limit(credentials.email, request)
+    user = await run_in_threadpool(authenticate_user_pooled, db, credentials)
 
     # Check if device is trusted (skip OTP)
     if credentials.device_token:
@@ -252,7 +346,7 @@ async def forgot_password_reset(
     verify_otp(db, data.email, data.otp_code, "password_reset", request)
 
     # Reset password
-    reset_user_password(db, data.email, data.new_password)
+    await run_in_threadpool(reset_user_password_pooled, db, data.email, data.new_password)
 
     return {"message": "Password reset successful. You can now sign in with your new password."}
 
@@ -262,7 +356,7 @@ async def forgot_password_reset(
 @router.post("/change-password")
 def change_password(
     data: PasswordChange,
-    current_user = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_profile),
     db: Session = Depends(get_db)
 ):
     """
@@ -277,14 +371,15 @@ def change_password(
         )
 
     # Verify current password
-    if not verify_password(data.current_password, current_user.hashed_password):
+    if not password_hasher.verify_from_thread(data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
 
     # Update to new password
-    current_user.hashed_password = get_password_hash(data.new_password)
+    current_user.hashed_password = password_hasher.hash_from_thread(data.new_password)
     db.commit()
+    principal_cache.invalidate(current_user.id)
 
     return {"message": "Password changed successfully"}
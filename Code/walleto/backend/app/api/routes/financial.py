@@ -1,35 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, File, Form, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import MAXYEAR, datetime, date, timedelta
+import io
 
-from app.core.database import get_db
-from app.api.routes.auth import get_current_user
-from app.models.user import User
+from app.core.database import get_db, get_async_db
+from app.core.responses import RowsJSONResponse
+from app.core.etag import make_etag, check_etag
+from app.api.routes.auth import get_current_user, get_current_user_async
+from app.schemas.user import Principal
 
 # Import schemas
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetResponse, BudgetWithSpending
-from app.schemas.account import AccountCreate, AccountUpdate, AccountResponse
-from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionResponse, TransactionWithDetails
+from app.schemas.account import AccountCreate, AccountUpdate, AccountResponse, BalancePoint
+from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionResponse, TransactionWithDetails, TransactionImportResult, PeriodSummary
 from app.schemas.dashboard import DashboardResponse
 
-# Import services
-from app.services import category_service, budget_service, account_service, transaction_service, dashboard_service
+# Import services (imports and exports stay on the sync session: parsing and
+# streaming are blocking work that belongs in the threadpool)
+from app.services import transaction_service, import_service, aio
 
 router = APIRouter(prefix="/financial", tags=["Financial"])
 
 
+async def _version_etag(db: AsyncSession, user_id: str, resource: str, *parts) -> str:
+    """
+    ETag of a user's read endpoint at its current data version.
+
+    The version is read before the data, so a concurrent write can only
+    label new data with an old tag (costing a refetch), never the reverse.
+    """
+    version = await aio.data_version_service.get_data_version(db, user_id, resource)
+    return make_etag(resource, user_id, version, *parts)
+
+
 # ============================================
 # DASHBOARD ROUTES
 # ============================================
 
 @router.get("/dashboard", response_model=DashboardResponse)
-def get_dashboard(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get complete dashboard data with stats, transactions, and budgets."""
-    return dashboard_service.get_dashboard_data(db, current_user.id)
+    """Get complete dashboard data with stats, transactions, and budgets. Supports If-None-Match."""
+    version = await aio.data_version_service.get_data_version(db, current_user.id, "dashboard")
+    # The stats and budgets cover the current month
+    etag = make_etag("dashboard", current_user.id, version, f"{datetime.now():%Y%m}")
+    response.headers.update(check_etag(request, etag))
+    return await aio.dashboard_service.get_dashboard_data(db, current_user.id, version)
 
 
 # ============================================
@@ -37,54 +61,58 @@ def get_dashboard(
 # ============================================
 
 @router.post("/categories", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
-def create_category(
+async def create_category(
     data: CategoryCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new budget category."""
-    return category_service.create_category(db, current_user.id, data)
+    return await aio.category_service.create_category(db, current_user.id, data)
 
 
 @router.get("/categories", response_model=List[CategoryResponse])
-def get_categories(
+async def get_categories(
+    request: Request,
+    response: Response,
     type: Optional[str] = Query(None, regex="^(income|expense)$"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all categories for the current user. Optional type filter: income or expense."""
-    return category_service.get_categories(db, current_user.id, type_filter=type)
+    """Get all categories for the current user. Optional type filter: income or expense. Supports If-None-Match."""
+    etag = await _version_etag(db, current_user.id, "categories", type or "all")
+    response.headers.update(check_etag(request, etag))
+    return await aio.category_service.get_categories(db, current_user.id, type_filter=type)
 
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
-def get_category(
+async def get_category(
     category_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific category."""
-    return category_service.get_category(db, current_user.id, category_id)
+    return await aio.category_service.get_category(db, current_user.id, category_id)
 
 
 @router.put("/categories/{category_id}", response_model=CategoryResponse)
-def update_category(
+async def update_category(
     category_id: str,
     data: CategoryUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a category."""
-    return category_service.update_category(db, current_user.id, category_id, data)
+    return await aio.category_service.update_category(db, current_user.id, category_id, data)
 
 
 @router.delete("/categories/{category_id}")
-def delete_category(
+async def delete_category(
     category_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a category."""
-    return category_service.delete_category(db, current_user.id, category_id)
+    return await aio.category_service.delete_category(db, current_user.id, category_id)
 
 
 # ============================================
@@ -92,55 +120,59 @@ def delete_category(
 # ============================================
 
 @router.post("/budgets", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
-def create_budget(
+async def create_budget(
     data: BudgetCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new budget limit for a category."""
-    return budget_service.create_budget(db, current_user.id, data)
+    return await aio.budget_service.create_budget(db, current_user.id, data)
 
 
 @router.get("/budgets", response_model=List[BudgetWithSpending])
-def get_budgets(
+async def get_budgets(
+    request: Request,
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None, ge=2020, le=2100),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all budgets with actual spending for a specific month."""
-    return budget_service.get_budgets(db, current_user.id, month, year)
+    """Get all budgets with actual spending for a specific month. Supports If-None-Match."""
+    now = datetime.now()
+    etag = await _version_etag(db, current_user.id, "budgets", year or now.year, month or now.month)
+    headers = check_etag(request, etag)
+    return RowsJSONResponse(await aio.budget_service.get_budgets(db, current_user.id, month, year), headers=headers)
 
 
 @router.get("/budgets/{budget_id}", response_model=BudgetResponse)
-def get_budget(
+async def get_budget(
     budget_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific budget."""
-    return budget_service.get_budget(db, current_user.id, budget_id)
+    return await aio.budget_service.get_budget(db, current_user.id, budget_id)
 
 
 @router.put("/budgets/{budget_id}", response_model=BudgetResponse)
-def update_budget(
+async def update_budget(
     budget_id: str,
     data: BudgetUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a budget."""
-    return budget_service.update_budget(db, current_user.id, budget_id, data)
+    return await aio.budget_service.update_budget(db, current_user.id, budget_id, data)
 
 
 @router.delete("/budgets/{budget_id}")
-def delete_budget(
+async def delete_budget(
     budget_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a budget."""
-    return budget_service.delete_budget(db, current_user.id, budget_id)
+    return await aio.budget_service.delete_budget(db, current_user.id, budget_id)
 
 
 # ============================================
@@ -148,54 +180,81 @@ def delete_budget(
 # ============================================
 
 @router.post("/accounts", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
-def create_account(
+async def create_account(
     data: AccountCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new account (bank account, wallet, etc.)."""
-    return account_service.create_account(db, current_user.id, data)
+    return await aio.account_service.create_account(db, current_user.id, data)
 
 
 @router.get("/accounts", response_model=List[AccountResponse])
-def get_accounts(
+async def get_accounts(
+    request: Request,
+    response: Response,
     active_only: bool = True,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all accounts for the current user."""
-    return account_service.get_accounts(db, current_user.id, active_only)
+    """Get all accounts for the current user. Supports If-None-Match."""
+    etag = await _version_etag(db, current_user.id, "accounts", "active" if active_only else "all")
+    response.headers.update(check_etag(request, etag))
+    return await aio.account_service.get_accounts(db, current_user.id, active_only)
 
 
 @router.get("/accounts/{account_id}", response_model=AccountResponse)
-def get_account(
+async def get_account(
     account_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific account."""
-    return account_service.get_account(db, current_user.id, account_id)
+    return await aio.account_service.get_account(db, current_user.id, account_id)
+
+
+@router.get("/accounts/{account_id}/history", response_model=List[BalancePoint])
+async def get_account_history(
+    account_id: str,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    step: str = Query("day", pattern="^(day|week|month)$"),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the account balance over time (default: the last 30 days)."""
+    to_date = to_date or date.today()
+    from_date = from_date or to_date - timedelta(days=30)
+    if to_date < from_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'"
+        )
+
+    return await aio.balance_history_service.get_balance_history(
+        db, current_user.id, account_id, from_date, to_date, step
+    )
 
 
 @router.put("/accounts/{account_id}", response_model=AccountResponse)
-def update_account(
+async def update_account(
     account_id: str,
     data: AccountUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an account."""
-    return account_service.update_account(db, current_user.id, account_id, data)
+    return await aio.account_service.update_account(db, current_user.id, account_id, data)
 
 
 @router.delete("/accounts/{account_id}")
-def delete_account(
+async def delete_account(
     account_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an account."""
-    return account_service.delete_account(db, current_user.id, account_id)
+    return await aio.account_service.delete_account(db, current_user.id, account_id)
 
 
 # ============================================
@@ -203,68 +262,169 @@ def delete_account(
 # ============================================
 
 @router.post("/transactions", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
-def create_transaction(
+async def create_transaction(
     data: TransactionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a new transaction (income or expense)."""
-    return transaction_service.create_transaction(db, current_user.id, data)
+    return await aio.transaction_service.create_transaction(db, current_user.id, data)
+
+
+@router.post("/transactions/import", response_model=TransactionImportResult)
+def import_transactions(
+    account_id: str = Form(...),
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None, pattern="^(csv|ofx|qif)$"),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Import a bank statement (CSV, OFX or QIF) into an account.
+
+    The format is taken from the file extension unless given explicitly.
+    Rows already imported into the account are skipped.
+    """
+    statement_format = import_service.detect_format(file.filename, format)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    rows = import_service.PARSERS[statement_format](stream)
+    return import_service.import_statement(db, current_user.id, account_id, rows)
 
 
 @router.get("/transactions", response_model=List[TransactionWithDetails])
-def get_transactions(
+async def get_transactions(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     type: Optional[str] = Query(None, regex="^(income|expense)$"),
     category_id: Optional[str] = None,
     account_id: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get all transactions with filters.
+
+    Pass the X-Next-Cursor header of a full page back as `cursor` to fetch the
+    next page; `skip` still works for older clients. `q` filters by text in
+    the description or notes.
+    """
+    transactions = await aio.transaction_service.get_transactions(
+        db, current_user.id, skip, limit, type, category_id, account_id, cursor, q
+    )
+
+    headers = {}
+    if len(transactions) == limit:
+        last = transactions[-1]
+        headers["X-Next-Cursor"] = transaction_service.encode_cursor(
+            last["transaction_date"], last["id"]
+        )
+
+    return RowsJSONResponse(transactions, headers=headers)
+
+
+@router.get("/transactions/search", response_model=List[TransactionWithDetails])
+async def search_transactions(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    type: Optional[str] = Query(None, pattern="^(income|expense)$"),
+    category_id: Optional[str] = None,
+    account_id: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all transactions with filters."""
-    return transaction_service.get_transactions(
-        db, current_user.id, skip, limit, type, category_id, account_id
+    """Search transaction descriptions and notes, ranked by relevance."""
+    return RowsJSONResponse(await aio.transaction_service.search_transactions(
+        db, current_user.id, q, skip, limit, type, category_id, account_id
+    ))
+
+
+@router.get("/transactions/export")
+def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    type: Optional[str] = Query(None, pattern="^(income|expense)$"),
+    category_id: Optional[str] = None,
+    account_id: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Download the full transaction history as CSV or NDJSON, streamed row by row."""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        transaction_service.iter_transaction_export(
+            current_user.id, format, type, category_id, account_id, start_date, end_date
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'}
     )
 
 
 @router.get("/transactions/{transaction_id}", response_model=TransactionResponse)
-def get_transaction(
+async def get_transaction(
     transaction_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific transaction."""
-    return transaction_service.get_transaction(db, current_user.id, transaction_id)
+    return await aio.transaction_service.get_transaction(db, current_user.id, transaction_id)
 
 
 @router.put("/transactions/{transaction_id}", response_model=TransactionResponse)
-def update_transaction(
+async def update_transaction(
     transaction_id: str,
     data: TransactionUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a transaction."""
-    return transaction_service.update_transaction(db, current_user.id, transaction_id, data)
+    return await aio.transaction_service.update_transaction(db, current_user.id, transaction_id, data)
 
 
 @router.delete("/transactions/{transaction_id}")
-def delete_transaction(
+async def delete_transaction(
     transaction_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a transaction."""
-    return transaction_service.delete_transaction(db, current_user.id, transaction_id)
+    return await aio.transaction_service.delete_transaction(db, current_user.id, transaction_id)
 
 
 @router.get("/transactions/summary/monthly")
-def get_monthly_summary(
+async def get_monthly_summary(
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020, le=2100),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get income and expense summary for a specific month."""
-    return transaction_service.get_monthly_summary(db, current_user.id, month, year)
+    return await aio.transaction_service.get_monthly_summary(db, current_user.id, month, year)
+
+
+@router.get("/transactions/summary/range", response_model=List[PeriodSummary])
+async def get_summary_range(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    granularity: str = Query("month", pattern="^(day|month|year)$"),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get income and expense totals for every day/month/year between two dates (inclusive)."""
+    if to_date < from_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' must not be before 'from'"
+        )
+    # The period after 'to' must still be a valid datetime
+    if to_date.year >= MAXYEAR:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'to' must be before the year {MAXYEAR}"
+        )
+
+    start = datetime.combine(from_date, datetime.min.time())
+    end = datetime.combine(to_date + timedelta(days=1), datetime.min.time())
+    return await aio.transaction_service.get_period_summaries(db, current_user.id, start, end, granularity)
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import threading
+import time
+from app.core.config import settings
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with per-entry TTL and LRU eviction.
+
+    Writers call invalidate() after committing. Readers that compute a value
+    take a token with reserve() first and pass it to put(); an invalidation
+    in between drops the token, so a stale result is never stored.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def reserve(self, key: Hashable) -> object:
+        """Start computing a value for key; pass the returned token to put()."""
+        token = object()
+        with self._lock:
+            self._pending[key] = token
+        return token
+
+    def put(self, key: Hashable, value: Any, token: Optional[object] = None):
+        """Store a value unless key was invalidated since reserve()."""
+        with self._lock:
+            if token is not None:
+                if self._pending.get(key) is not token:
+                    return
+                del self._pending[key]
+
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def release(self, key: Hashable, token: object):
+        """End a reserve() that stored nothing (no value, or an error); a no-op after put()."""
+        with self._lock:
+            if self._pending.get(key) is token:
+                del self._pending[key]
+
+    def invalidate(self, key: Hashable):
+        """Drop a key and any in-flight computation for it."""
+        with self._lock:
+            self._pending.pop(key, None)
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring and tuning."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Per-user DashboardResponse cache; every financial write invalidates its user
+dashboard_cache = TTLCache(
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS,
+    max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES
+)
+
+# Per-user Principal cache for token resolution; profile and password
+# changes invalidate their user
+principal_cache = TTLCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES
+)
@@ -10,11 +10,29 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    # Defaults to DATABASE_URL with its async driver (asyncpg / aiosqlite)
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool (per engine; the sync and async engines each get one)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 keeps connections forever
+    DB_POOL_PRE_PING: bool = False  # one extra round trip per checkout
+    # Behind PgBouncer (transaction mode): no app-side pool, no prepared statements
+    DB_PGBOUNCER: bool = False
 
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # /metrics answers only requests bearing this token; unset, it is disabled
+    METRICS_TOKEN: Optional[str] = None
+
+    # Password hashing (bcrypt cost; hashes at another cost are upgraded on login)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
 
     # CORS
     FRONTEND_URL: str = "http://localhost:3000"
@@ -25,6 +43,64 @@ class Settings(BaseSettings):
     SMTP_USERNAME: str = ""
     SMTP_PASSWORD: str = ""
     SMTP_FROM: str = ""
+    SMTP_USE_TLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    # Background delivery: worker threads, each reusing one connection
+    SMTP_WORKERS: int = 2
+    SMTP_QUEUE_MAX: int = 1000
+    SMTP_MAX_RETRIES: int = 3
+    SMTP_RETRY_BACKOFF_SECONDS: float = 2.0
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 30.0
+
+    # Dashboard cache (per-process, per-user)
+    DASHBOARD_CACHE_TTL_SECONDS: float = 30.0
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 1024
+
+    # Rate limiting ("memory" per process, or "redis" shared across workers)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_REDIS_URL: Optional[str] = None
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_WINDOW_SECONDS: int = 600
+    OTP_GENERATE_PER_EMAIL: int = 3
+    OTP_GENERATE_PER_IP: int = 20
+    OTP_VERIFY_PER_EMAIL: int = 5
+    OTP_VERIFY_PER_IP: int = 50
+    SIGNIN_PER_EMAIL: int = 10
+    SIGNIN_PER_IP: int = 50
+
+    # Background audit writes (otp_attempts)
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_SECONDS: float = 1.0
+    AUDIT_QUEUE_MAX: int = 10000
+
+    # Expired-data cleanup: rows per DELETE, and wall-clock budget per run
+    CLEANUP_BATCH_SIZE: int = 1000
+    CLEANUP_TIME_BUDGET_SECONDS: float = 30.0
+    OTP_ATTEMPT_RETENTION_DAYS: int = 7
+    # PostgreSQL only, for a new otp_attempts table: daily partitions, so
+    # retention drops whole partitions instead of deleting rows
+    OTP_ATTEMPTS_PARTITIONED: bool = False
+
+    # Trusted-device last_used: buffered, written in bulk
+    DEVICE_LAST_USED_MAX_STALENESS_SECONDS: float = 60.0
+    DEVICE_LAST_USED_FLUSH_SIZE: int = 500
+
+    # Profile pictures (user_avatars)
+    AVATAR_MAX_BYTES: int = 2 * 1024 * 1024
+    AVATAR_THUMBNAIL_PX: int = 128
+    AVATAR_CACHE_SECONDS: int = 31536000
+
+    # Per-request SQL count and time: Server-Timing header, logs and /metrics
+    QUERY_METRICS_ENABLED: bool = True
+    SERVER_TIMING_ENABLED: bool = True
+    # Requests running more statements than this are logged as warnings
+    QUERY_BUDGET_PER_REQUEST: int = 20
+    # Also log every request's query summary at INFO
+    QUERY_LOG_REQUESTS: bool = False
+
+    # Authenticated-user cache (per-process)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 4096
 
     # Google OAuth
     GOOGLE_CLIENT_ID: Optional[str] = None
@@ -1,22 +1,205 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, delete, select, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.pool_metrics import pool_metrics, TimedQueuePool, TimedAsyncAdaptedQueuePool, TimedNullPool
+from app.core import query_metrics
+from uuid import uuid4
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Async drivers for the sync URLs we accept in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Swap the driver of a sync database URL for its async counterpart."""
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+
+def engine_options(url: str, name: str) -> dict:
+    """Pool arguments from Settings for the "sync" or "async" engine."""
+    url = make_url(url)
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_logging_name": name,  # keys pool_metrics
+    }
+
+    if settings.DB_PGBOUNCER:
+        # PgBouncer owns the pool; transaction mode can't keep named
+        # prepared statements across server connections
+        options["poolclass"] = TimedNullPool
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection; keep its default pool
+        return options
+
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if name == "async" else TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using them
     echo=False,  # Set to True only if you need to debug SQL queries
+    **engine_options(settings.DATABASE_URL, "sync")
 )
+pool_metrics["sync"].instrument(engine)
+if settings.QUERY_METRICS_ENABLED:
+    query_metrics.instrument(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers; the scheduler and scripts keep the sync one
+ASYNC_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_URL,
+    echo=False,
+    **engine_options(ASYNC_URL, "async")
+)
+pool_metrics["async"].instrument(async_engine.sync_engine)
+if settings.QUERY_METRICS_ENABLED:
+    query_metrics.instrument(async_engine.sync_engine)
+
+# Objects are serialized after the handler returns, outside the session's
+# greenlet, so they must not expire (and lazy-load) on commit
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
 
+def create_missing_indexes():
+    """
+    Create indexes declared on models but missing from existing tables.
+
+    create_all() only creates indexes along with a new table, and there
+    are no migrations; without this, indexes added to a model never reach
+    a database created before them.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                logger.info(f"Creating index {index.name} on {table.name}")
+                index.create(bind=engine)
+
+
+def add_missing_columns():
+    """
+    Add nullable columns declared on models but missing from existing tables.
+
+    Like create_missing_indexes(), this stands in for migrations: create_all()
+    leaves existing tables alone, so a column added to a model (e.g.
+    transactions.import_hash) would otherwise never reach an older database
+    and every query selecting it would fail. Run before create_missing_indexes(),
+    which may index the new columns. Columns that can't be added without a
+    value are left for a manual migration and logged.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable or column.server_default is not None:
+                logger.error(f"Column {table.name}.{column.name} is missing and needs a manual migration")
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            logger.info(f"Adding column {column.name} to {table.name}")
+            with engine.begin() as conn:
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+
+
+def upgrade_sqlite_search_index():
+    """
+    Move an existing SQLite transactions_fts onto transactions.search_rowid.
+
+    Older databases keyed the FTS table by the implicit rowid, which VACUUM
+    may renumber. Adds the column (filled from the current rowids), recreates
+    the FTS table and triggers and rebuilds the index. Run before
+    add_missing_columns(), which would otherwise add the column unfilled, and
+    create_missing_indexes(), which adds the column's unique index.
+    """
+    from app.models.transaction import SQLITE_SEARCH_DDL
+
+    if engine.dialect.name != "sqlite":
+        return
+    inspector = inspect(engine)
+    if not inspector.has_table("transactions"):
+        return
+    if "search_rowid" in {column["name"] for column in inspector.get_columns("transactions")}:
+        return
+
+    logger.info("Rekeying transactions_fts on transactions.search_rowid")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE transactions ADD COLUMN search_rowid INTEGER")
+        conn.exec_driver_sql("UPDATE transactions SET search_rowid = rowid")
+        for trigger in ("transactions_fts_ai", "transactions_fts_ad", "transactions_fts_au"):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.exec_driver_sql("DROP TABLE IF EXISTS transactions_fts")
+        for statement in SQLITE_SEARCH_DDL:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+
+
+def delete_in_batches(db, model, *criteria, batch_size: int, deadline: float) -> int:
+    """
+    Delete rows of `model` matching `criteria`, `batch_size` rows per transaction.
+
+    Each batch commits on its own so locks and WAL stay small. Stops once
+    a batch comes back short or time.monotonic() passes `deadline`; the
+    rest is left for the next run.
+
+    Returns:
+        int: Number of rows deleted
+    """
+    batch = select(model.id).where(*criteria).limit(batch_size).scalar_subquery()
+    deleted = 0
+    while True:
+        result = db.execute(
+            delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+        if time.monotonic() >= deadline:
+            logger.info(f"Cleanup of {model.__tablename__} stopped at its time budget after {deleted} rows")
+            return deleted
+
+
 def get_db():
     """Dependency to get database session."""
     db = SessionLocal()
@@ -24,3 +207,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,29 @@
+from typing import Optional
+from fastapi import HTTPException, Request, status
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the values that determine a response."""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison: any listed tag, weak or strong, or *."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def check_etag(request: Request, etag: str, cache_control: str = "private, no-cache") -> dict:
+    """
+    Raise 304 Not Modified if the client already holds `etag`.
+
+    Returns:
+        dict: Headers to send with the full response
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return headers
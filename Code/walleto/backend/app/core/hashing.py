@@ -0,0 +1,89 @@
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core import security
+import anyio.from_thread
+import asyncio
+import multiprocessing
+import threading
+
+
+class PasswordHasher:
+    """
+    Run bcrypt in a bounded pool of worker processes.
+
+    A bcrypt call takes ~100-300 ms of CPU; awaiting it here keeps the
+    event loop (and the GIL) free for other requests. At most
+    PASSWORD_HASH_MAX_PENDING calls may be queued; beyond that callers get
+    503 instead of piling up behind a signin storm.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs worker threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def start(self):
+        """Start the worker processes now rather than on the first login."""
+        pool = self._pool()
+        for _ in range(self.workers):
+            pool.submit(security.needs_rehash, "")
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy. Please try again in a moment.",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """get_password_hash() in a worker process."""
+        return await self._run(security.get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password() in a worker process."""
+        return await self._run(security.verify_password, plain_password, hashed_password)
+
+    def hash_from_thread(self, password: str) -> str:
+        """hash() for sync routes: blocks the calling worker thread, not the event loop."""
+        return anyio.from_thread.run(self.hash, password)
+
+    def verify_from_thread(self, plain_password: str, hashed_password: str) -> bool:
+        """verify() for sync routes: blocks the calling worker thread, not the event loop."""
+        return anyio.from_thread.run(self.verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"workers": self.workers, "pending": self._pending, "max_pending": self.max_pending}
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,71 @@
+from datetime import datetime, time, timedelta, timezone
+from typing import Tuple
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """
+    Convert an aware datetime to naive UTC; naive values pass through as given.
+
+    Transaction dates are stored naive, like the period bounds here, so
+    Python's .year/.month (incremental rollups) and the database's extract()
+    (rebuild_rollups) put a transaction in the same month. Aware values go
+    to UTC rather than the server's zone, so the month never depends on the
+    host's TZ.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    """
+    Return the half-open [start, end) datetime range covering a calendar month.
+
+    Filtering with `transaction_date >= start AND transaction_date < end`
+    keeps the column bare so an index on transaction_date can be used,
+    unlike extract('month'/'year', ...) comparisons.
+    """
+    start = datetime(year, month, 1)
+    if month == 12:
+        end = datetime(year + 1, 1, 1)
+    else:
+        end = datetime(year, month + 1, 1)
+    return start, end
+
+
+GRANULARITIES = ("day", "month", "year")
+
+
+def truncate_to_period(value: datetime, granularity: str) -> datetime:
+    """Return the start of the day/month/year period containing value."""
+    if granularity == "day":
+        return datetime(value.year, value.month, value.day)
+    if granularity == "month":
+        return datetime(value.year, value.month, 1)
+    return datetime(value.year, 1, 1)
+
+
+def next_period(start: datetime, granularity: str) -> datetime:
+    """Return the start of the period following the one beginning at start."""
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "month":
+        return month_bounds(start.year, start.month)[1]
+    return datetime(start.year + 1, 1, 1)
+
+
+def count_periods(start: datetime, end: datetime, granularity: str) -> int:
+    """Number of day/month/year periods overlapping [start, end), without enumerating them."""
+    first = truncate_to_period(start, granularity)
+    if end <= first:
+        return 0
+    if granularity == "day":
+        return (end - first).days + (0 if end.time() == time.min else 1)
+    if granularity == "month":
+        return (end.year - first.year) * 12 + end.month - first.month + (0 if is_month_start(end) else 1)
+    return end.year - first.year + (0 if is_month_start(end) and end.month == 1 else 1)
+
+
+def is_month_start(value: datetime) -> bool:
+    """True if value is midnight on the first day of a month."""
+    return value.day == 1 and value.time() == time.min
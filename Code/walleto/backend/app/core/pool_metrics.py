@@ -0,0 +1,128 @@
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool
+import threading
+import time
+
+
+class PoolMetrics:
+    """
+    Connection pool counters for one engine, fed by pool events.
+
+    Checkout wait is timed by the Timed* pool classes below, since pool
+    events only fire once a connection has been handed out.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engine = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.overflow_checkouts = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def instrument(self, engine: Engine):
+        """Listen to the engine's pool events (they survive pool recreation)."""
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "soft_invalidate", self._on_soft_invalidate)
+        self._engine = engine
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        overflow = self._live("overflow")
+        with self._lock:
+            self.checkouts += 1
+            if overflow is not None and overflow > 0:
+                self.overflow_checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_soft_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.soft_invalidations += 1
+
+    def _live(self, name: str):
+        """Current value of a QueuePool gauge (size, checkedout, overflow), or None."""
+        pool = self._engine.pool if self._engine is not None else None
+        if not isinstance(pool, QueuePool):
+            return None
+        # overflow() counts down from -pool_size until the pool has filled up
+        return max(getattr(pool, name)(), 0)
+
+    def stats(self) -> dict:
+        """Counters plus live pool gauges, for /metrics."""
+        with self._lock:
+            return {
+                "pool": type(self._engine.pool).__name__ if self._engine is not None else None,
+                "size": self._live("size"),
+                "checked_out": self._live("checkedout"),
+                "overflow": self._live("overflow"),
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "overflow_checkouts": self.overflow_checkouts,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": (self.wait_seconds_total / self.waits * 1000) if self.waits else 0.0,
+                "wait_ms_max": self.wait_seconds_max * 1000,
+            }
+
+
+# One PoolMetrics per engine, keyed by the engine's pool_logging_name
+pool_metrics = {"sync": PoolMetrics(), "async": PoolMetrics()}
+
+
+class _TimedCheckout:
+    """Pool mixin timing connect() (queue wait plus any new connection) into pool_metrics."""
+
+    def connect(self):
+        metrics = pool_metrics.get(getattr(self, "logging_name", None))
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if metrics:
+                metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        if metrics:
+            metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
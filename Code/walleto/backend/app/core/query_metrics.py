@@ -0,0 +1,155 @@
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+import threading
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Slowest statement as logged, truncated
+STATEMENT_LOG_CHARS = 300
+
+
+class RequestQueries:
+    """SQL statements run on behalf of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """Server-Timing value: total DB time with the query count, and the slowest query."""
+        return (
+            f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries", '
+            f'db-slowest;dur={self.slowest_seconds * 1000:.2f}'
+        )
+
+
+# Set per request by QueryTimingMiddleware; threadpool routes and the async
+# engine's greenlets run in a copy of the request's context, sharing the object
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    queries = _current.get()
+    started = getattr(context, "_query_started", None)
+    if queries is not None and started is not None:
+        queries.record(statement, time.perf_counter() - started)
+
+
+def instrument(engine: Engine):
+    """Time every statement the engine runs into the current request's RequestQueries."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStats:
+    """Process-wide counters of requests that went over QUERY_BUDGET_PER_REQUEST."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.queries = 0
+        self.over_budget = 0
+        self.over_budget_routes = {}
+
+    def record(self, route: str, queries: RequestQueries):
+        with self._lock:
+            self.requests += 1
+            self.queries += queries.count
+            if queries.count > settings.QUERY_BUDGET_PER_REQUEST:
+                self.over_budget += 1
+                self.over_budget_routes[route] = self.over_budget_routes.get(route, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "queries_avg": (self.queries / self.requests) if self.requests else 0.0,
+                "budget": settings.QUERY_BUDGET_PER_REQUEST,
+                "over_budget": self.over_budget,
+                "over_budget_routes": dict(self.over_budget_routes),
+            }
+
+
+query_stats = QueryStats()
+
+
+class QueryTimingMiddleware:
+    """
+    Count and time each request's SQL; report it in Server-Timing and the logs.
+
+    The header covers statements run before the response starts, which for
+    these routes is all of them. Requests over QUERY_BUDGET_PER_REQUEST are
+    logged as warnings with their slowest statement.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = _current.set(queries)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", queries.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._report(scope, queries)
+
+    @staticmethod
+    def _route_name(scope: dict) -> str:
+        """Method and path template, so /transactions/{id} counts as one route."""
+        path = scope["path"]
+        template = getattr(scope.get("route"), "path", None)
+        if template:
+            # The route's template leaves out the router prefix; take it from the path
+            try:
+                rendered = template.format(**scope.get("path_params", {}))
+            except (KeyError, IndexError, ValueError):
+                rendered = None
+            if rendered and path.endswith(rendered):
+                path = path[:len(path) - len(rendered)] + template
+        return f"{scope['method']} {path}"
+
+    def _report(self, scope: dict, queries: RequestQueries):
+        name = self._route_name(scope)
+        query_stats.record(name, queries)
+
+        slowest = " ".join((queries.slowest_statement or "").split())[:STATEMENT_LOG_CHARS]
+        summary = (
+            f"{name}: {queries.count} queries in {queries.seconds * 1000:.1f} ms, "
+            f"slowest {queries.slowest_seconds * 1000:.1f} ms"
+        )
+        if queries.count > settings.QUERY_BUDGET_PER_REQUEST:
+            logger.warning(f"Query budget of {settings.QUERY_BUDGET_PER_REQUEST} exceeded by {summary}: {slowest}")
+        elif settings.QUERY_LOG_REQUESTS and queries.count:
+            logger.info(f"{summary}: {slowest}")
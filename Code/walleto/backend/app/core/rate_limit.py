@@ -0,0 +1,155 @@
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Iterable, List
+from fastapi import HTTPException, status
+from app.core.config import settings
+import math
+import threading
+import time
+import uuid
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """At most `limit` hits on `key` within any `window_seconds` sliding window."""
+    key: str
+    limit: int
+    window_seconds: float
+
+
+class MemoryRateLimitBackend:
+    """
+    Sliding-window log per key, in process memory.
+
+    Each key keeps the timestamps of its last `limit` hits, so memory is
+    bounded by limit x keys; the least recently used keys are dropped
+    beyond max_keys. Only correct for a single worker process.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, limits: List[RateLimit]) -> float:
+        """
+        Record one hit against every limit if none is exhausted.
+
+        Returns 0 when allowed, otherwise the seconds until the earliest
+        retry could succeed (and nothing is recorded).
+        """
+        now = time.monotonic()
+        with self._lock:
+            retry_after = 0.0
+            for rule in limits:
+                hits = self._hits.get(rule.key)
+                if hits is None:
+                    continue
+                while hits and hits[0] <= now - rule.window_seconds:
+                    hits.popleft()
+                if len(hits) >= rule.limit:
+                    retry_after = max(retry_after, hits[0] + rule.window_seconds - now)
+
+            if retry_after > 0:
+                self.limited += 1
+                return retry_after
+
+            for rule in limits:
+                hits = self._hits.get(rule.key)
+                if hits is None:
+                    hits = self._hits[rule.key] = deque(maxlen=rule.limit)
+                hits.append(now)
+                self._hits.move_to_end(rule.key)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+
+            self.allowed += 1
+            return 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": "memory", "keys": len(self._hits), "allowed": self.allowed, "limited": self.limited}
+
+
+# Checks every limit, then records all of them only if none is exhausted,
+# atomically. KEYS are the limit keys; ARGV is now, a unique member, then
+# a (limit, window) pair per key.
+_REDIS_HIT = """
+local now = tonumber(ARGV[1])
+local retry = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + i * 2])
+    local window = tonumber(ARGV[2 + i * 2])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        retry = math.max(retry, tonumber(oldest[2]) + window - now)
+    end
+end
+if retry > 0 then
+    return tostring(retry)
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[2])
+    redis.call('EXPIRE', key, math.ceil(tonumber(ARGV[2 + i * 2])))
+end
+return '0'
+"""
+
+
+class RedisRateLimitBackend:
+    """Sliding-window log per key in Redis sorted sets, shared by every worker."""
+
+    def __init__(self, url: str, prefix: str = "walleto:ratelimit:"):
+        if not url:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires RATE_LIMIT_REDIS_URL")
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package (pip install redis)")
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_HIT)
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, limits: List[RateLimit]) -> float:
+        """Same contract as MemoryRateLimitBackend.hit, evaluated in one round trip."""
+        args = [time.time(), uuid.uuid4().hex]
+        for rule in limits:
+            args += [rule.limit, rule.window_seconds]
+
+        retry_after = float(self._script(keys=[self.prefix + rule.key for rule in limits], args=args))
+        if retry_after > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "allowed": self.allowed, "limited": self.limited}
+
+
+def _build_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND {settings.RATE_LIMIT_BACKEND!r}; use 'memory' or 'redis'")
+    return MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = _build_backend()
+
+
+def enforce_rate_limit(limits: Iterable[RateLimit], detail: str):
+    """Count a hit against every limit, or raise 429 with Retry-After if any is exhausted."""
+    retry_after = rate_limiter.hit(list(limits))
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
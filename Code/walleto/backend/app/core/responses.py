@@ -0,0 +1,17 @@
+from fastapi.responses import Response
+import orjson
+
+
+class RowsJSONResponse(Response):
+    """
+    JSON response for handlers that already hold plain dicts, encoded by orjson.
+
+    Returning it bypasses response_model validation, so the rows must
+    already have the documented shape; response_model stays on the route
+    for the OpenAPI schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        # Z for UTC, as pydantic writes it
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
@@ -1,13 +1,25 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from typing import Optional
+import hmac
 import logging
+import time
 from app.core.config import settings
-from app.core.database import SessionLocal, engine, Base
+from app.core.database import SessionLocal, engine, Base, add_missing_columns, create_missing_indexes, upgrade_sqlite_search_index
+from app.core.cache import dashboard_cache
+from app.core.pool_metrics import pool_metrics
+from app.core.query_metrics import QueryTimingMiddleware, query_stats
 from app.api.routes import auth, otp, financial
-from app.services.otp_service import cleanup_expired_otps
+from app.services.otp_service import cleanup_expired_otps, maintain_otp_attempt_partitions
 from app.services.device_service import cleanup_expired_devices
+from app.services.balance_history_service import write_balance_checkpoints
+from app.services.email import email_queue
+from app.services.audit_log import otp_attempt_log
+from app.services.device_activity import device_last_used
+from app.core.rate_limit import rate_limiter
+from app.core.hashing import password_hasher
 
 # Import all models to ensure they're registered with Base
 from app import models
@@ -27,17 +39,38 @@ async def lifespan(app: FastAPI):
     # STARTUP: This code runs when the app starts
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    upgrade_sqlite_search_index()
+    add_missing_columns()
+    create_missing_indexes()
     logger.info("Database tables created/verified")
 
+    db = SessionLocal()
+    try:
+        maintain_otp_attempt_partitions(db)
+    finally:
+        db.close()
+
     scheduler.add_job(
         run_cleanup,
         'interval',
         minutes=5,
         id='cleanup_expired_data'
     )
+    scheduler.add_job(
+        run_balance_checkpoints,
+        'cron',
+        hour=0,
+        minute=15,
+        id='balance_checkpoints'
+    )
     scheduler.start()
     logger.info("Cleanup scheduler started - running every 5 minutes")
 
+    email_queue.start()
+    otp_attempt_log.start()
+    device_last_used.start()
+    password_hasher.start()
+
     # Let the app run
     yield
 
@@ -45,6 +78,11 @@ async def lifespan(app: FastAPI):
     scheduler.shutdown()
     logger.info("OTP cleanup scheduler stopped")
 
+    email_queue.stop()
+    otp_attempt_log.stop()
+    device_last_used.stop()
+    password_hasher.shutdown()
+
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -61,15 +99,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# Added after CORS so it wraps it and times every request
+if settings.QUERY_METRICS_ENABLED:
+    app.add_middleware(QueryTimingMiddleware)
+
 
 def run_cleanup():
-    """Execute cleanup in background."""
+    """Execute cleanup in background, within CLEANUP_TIME_BUDGET_SECONDS."""
+    deadline = time.monotonic() + settings.CLEANUP_TIME_BUDGET_SECONDS
     db = SessionLocal()
     try:
-        deleted_otps, deleted_attempts = cleanup_expired_otps(db)
-        deleted_devices = cleanup_expired_devices(db)
+        deleted_devices = cleanup_expired_devices(db, deadline)
+        # otp_attempts is the big table; whatever is left waits for the next run
+        deleted_otps, deleted_attempts = cleanup_expired_otps(db, deadline)
 
         if deleted_otps > 0 or deleted_attempts > 0 or deleted_devices > 0:
             logger.info(
@@ -82,6 +127,18 @@ def run_cleanup():
         db.close()
 
 
+def run_balance_checkpoints():
+    """Snapshot yesterday's closing balance for every account."""
+    db = SessionLocal()
+    try:
+        written = write_balance_checkpoints(db)
+        logger.info(f"Balance checkpoints written for {written} accounts")
+    except Exception as e:
+        logger.error(f"Balance checkpoint error: {str(e)}")
+    finally:
+        db.close()
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(otp.router, prefix="/api")
@@ -102,3 +159,32 @@ def root():
 def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+def require_metrics_token(authorization: Optional[str] = Header(None)):
+    """Allow /metrics only with METRICS_TOKEN as a bearer token; 404 while it is unset."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+def metrics():
+    """Internal runtime counters for tuning caches and connection pools."""
+    return {
+        "dashboard_cache": dashboard_cache.stats(),
+        "email_queue": email_queue.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "otp_attempt_log": otp_attempt_log.stats(),
+        "device_last_used": device_last_used.stats(),
+        "password_hasher": password_hasher.stats(),
+        "db_pools": {name: pool.stats() for name, pool in pool_metrics.items()},
+        "db_queries": query_stats.stats()
+    }
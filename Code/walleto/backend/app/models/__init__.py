@@ -1,9 +1,13 @@
 from app.models.user import User
+from app.models.avatar import UserAvatar
 from app.models.otp import OTP, OTPAttempt
 from app.models.category import Category
 from app.models.budget import Budget
 from app.models.account import Account
 from app.models.transaction import Transaction
 from app.models.trusted_device import TrustedDevice
+from app.models.rollup import MonthlyRollup
+from app.models.balance_checkpoint import BalanceCheckpoint
+from app.models.data_version import UserDataVersion
 
-__all__ = ["User", "OTP", "OTPAttempt", "Category", "Budget", "Account", "Transaction", "TrustedDevice"]
+__all__ = ["User", "UserAvatar", "OTP", "OTPAttempt", "Category", "Budget", "Account", "Transaction", "TrustedDevice", "MonthlyRollup", "BalanceCheckpoint", "UserDataVersion"]
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, LargeBinary, DateTime, ForeignKey
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class UserAvatar(Base):
+    """
+    A user's profile picture, kept out of the users row.
+    The original is only loaded when served; the thumbnail is generated on upload.
+    """
+    __tablename__ = "user_avatars"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    content_type = Column(String(32), nullable=False)
+    image = deferred(Column(LargeBinary, nullable=False))
+    thumbnail_type = Column(String(32), nullable=False)
+    thumbnail = deferred(Column(LargeBinary, nullable=False))
+    etag = Column(String(64), nullable=False)  # sha256 of the original
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
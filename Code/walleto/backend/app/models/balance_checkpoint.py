@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+import uuid
+from app.core.database import Base
+
+
+class BalanceCheckpoint(Base):
+    """
+    Snapshot of an account's balance at the end of a day.
+    Written daily by the scheduler so balance history never replays all transactions.
+    """
+    __tablename__ = "balance_checkpoints"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    account_id = Column(String, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+
+    as_of = Column(Date, nullable=False)  # Balance at the end of this day
+    balance = Column(Float, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("account_id", "as_of", name="uq_balance_checkpoints_account_as_of"),
+    )
+
+    def __repr__(self):
+        return f"<BalanceCheckpoint {self.as_of} ${self.balance}>"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Integer, ForeignKey
+from app.core.database import Base
+
+
+class UserDataVersion(Base):
+    """
+    Per-user counters of the financial read endpoints, bumped by every write.
+    They key ETags, so an unchanged resource is answered with 304 without querying it.
+    """
+    __tablename__ = "user_data_versions"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    accounts = Column(Integer, nullable=False, default=0)
+    categories = Column(Integer, nullable=False, default=0)
+    budgets = Column(Integer, nullable=False, default=0)
+    dashboard = Column(Integer, nullable=False, default=0)
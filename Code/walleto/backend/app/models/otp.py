@@ -2,6 +2,7 @@ from sqlalchemy import Column, String, Boolean, DateTime
 from datetime import datetime
 import uuid
 from app.core.database import Base
+from app.core.config import settings
 
 
 class OTP(Base):
@@ -12,7 +13,7 @@ class OTP(Base):
     email = Column(String, nullable=False, index=True)
     otp_code = Column(String(6), nullable=False)
     purpose = Column(String(20), nullable=False)  # 'signup' or 'signin'
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     verified = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.now)
 
@@ -30,7 +31,12 @@ class OTPAttempt(Base):
     success = Column(Boolean, nullable=False)
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.now)
+    # Partitioned tables need the partition key in the primary key
+    created_at = Column(DateTime, default=datetime.now, index=True, primary_key=settings.OTP_ATTEMPTS_PARTITIONED)
+
+    if settings.OTP_ATTEMPTS_PARTITIONED:
+        # One partition per day (PostgreSQL), see maintain_otp_attempt_partitions
+        __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     def __repr__(self):
         return f"<OTPAttempt {self.email} - {self.attempt_type}>"
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+import uuid
+from app.core.database import Base
+
+
+class MonthlyRollup(Base):
+    """
+    Running income/expense totals per user, category, type and month.
+    Kept in step with transactions so summaries don't re-sum raw rows.
+    """
+    __tablename__ = "monthly_rollups"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(String, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)  # None = uncategorized
+
+    # Rollup key
+    type = Column(String, nullable=False)  # income or expense
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)  # Month (1-12)
+
+    # Aggregates
+    total = Column(Float, default=0.0, nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_monthly_rollups_user_period", "user_id", "year", "month", "type", "category_id"),
+    )
+
+    def __repr__(self):
+        return f"<MonthlyRollup {self.type} {self.month}/{self.year} ${self.total}>"
@@ -1,8 +1,19 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Text
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, Float, Integer, DateTime, ForeignKey, Text, Index, Table, MetaData, DDL, event
+from sqlalchemy.sql import func, literal_column
 import uuid
 from app.core.database import Base
 
+# Postgres text search configuration; 'simple' avoids language-specific stemming of merchant names
+SEARCH_CONFIG = "simple"
+
+
+def search_vector(description, notes):
+    """tsvector over description and notes; queries must use this exact expression to hit the GIN index."""
+    return func.to_tsvector(
+        literal_column(f"'{SEARCH_CONFIG}'"),
+        description.concat(literal_column("' '")).concat(func.coalesce(notes, literal_column("''")))
+    )
+
 
 class Transaction(Base):
     """
@@ -25,9 +36,70 @@ class Transaction(Base):
     # Transaction date (user can backdate transactions)
     transaction_date = Column(DateTime(timezone=True), nullable=False, default=func.now())
 
+    # Content hash of (account, date, amount, description) for statement imports
+    import_hash = Column(String(64), nullable=True)
+
+    # SQLite only: stable integer key of the row in transactions_fts, set by a
+    # trigger (the implicit rowid of a text-keyed table may change on VACUUM)
+    search_rowid = Column(Integer, nullable=True)
+
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Backs keyset pagination: newest first, id breaks ties on equal dates
+        Index("ix_transactions_user_date_id", "user_id", transaction_date.desc(), id.desc()),
+        # Monthly income/expense sums use half-open date ranges per type
+        Index("ix_transactions_user_type_date", "user_id", "type", "transaction_date"),
+        # Per-account date ranges (nightly balance checkpoints, balance history)
+        Index("ix_transactions_account_date", "account_id", "transaction_date"),
+        # Duplicate detection when the same statement is imported twice
+        Index("ix_transactions_account_import_hash", "account_id", "import_hash"),
+        Index("ux_transactions_search_rowid", "search_rowid", unique=True).ddl_if(dialect="sqlite"),
+        # Full-text search over description and notes (Postgres only; SQLite uses FTS5 below)
+        Index(
+            "ix_transactions_search",
+            search_vector(description, notes),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+
     def __repr__(self):
         return f"<Transaction {self.type} ${self.amount} - {self.description}>"
+
+
+# SQLite full-text index: an external-content FTS5 table kept in sync by triggers,
+# keyed by transactions.search_rowid (max + 1 on insert). Deleting the row with the
+# highest key lets the next insert reuse it, which is safe: the delete trigger has
+# already removed that key's index entry.
+# Declared on its own MetaData so create_all() never tries to create it as a plain table.
+transactions_fts = Table(
+    "transactions_fts",
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("description", String),
+    Column("notes", Text),
+    Column("rank", Float),
+)
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts "
+    "USING fts5(description, notes, content='transactions', content_rowid='search_rowid')",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN "
+    "UPDATE transactions SET search_rowid = (SELECT coalesce(max(search_rowid), 0) + 1 FROM transactions) "
+    "WHERE rowid = new.rowid; "
+    "INSERT INTO transactions_fts(rowid, description, notes) "
+    "SELECT search_rowid, description, notes FROM transactions WHERE rowid = new.rowid; END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description, notes) "
+    "VALUES ('delete', old.search_rowid, old.description, old.notes); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF description, notes ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description, notes) "
+    "VALUES ('delete', old.search_rowid, old.description, old.notes); "
+    "INSERT INTO transactions_fts(rowid, description, notes) "
+    "VALUES (new.search_rowid, new.description, new.notes); END",
+)
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Index
 from datetime import datetime
 from app.core.database import Base
 import uuid
@@ -9,11 +9,16 @@ class TrustedDevice(Base):
     __tablename__ = "trusted_devices"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     device_token = Column(String, unique=True, nullable=False, index=True)
     device_info = Column(String, nullable=True)  # User agent or device fingerprint
     ip_address = Column(String, nullable=True)
     last_used = Column(DateTime, default=datetime.now)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        # A user's valid devices: trusted sign-in checks and the device list
+        Index("ix_trusted_devices_user_active_expires", "user_id", "is_active", "expires_at"),
+    )
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Date
+from sqlalchemy import Column, String, Boolean, DateTime, Date, select
+from sqlalchemy.orm import column_property, deferred
 from sqlalchemy.sql import func
 import uuid
 from app.core.database import Base
+from app.models.avatar import UserAvatar
 
 
 class User(Base):
@@ -18,7 +20,8 @@ class User(Base):
     # Profile info (from onboarding)
     username = Column(String, unique=True, index=True, nullable=True)
     nickname = Column(String, nullable=True)
-    profile_picture = Column(String, nullable=True)  # Base64 encoded image
+    # Legacy inline base64 image; moved to user_avatars by app.scripts.migrate_avatars or the next upload
+    profile_picture = deferred(Column(String, nullable=True))
 
     # Additional profile information
     birthdate = Column(Date, nullable=True)
@@ -43,5 +46,18 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Loaded only when accessed (for avatar_url)
+    avatar_etag = column_property(
+        select(UserAvatar.etag).where(UserAvatar.user_id == id).scalar_subquery(),
+        deferred=True
+    )
+
+    @property
+    def avatar_url(self):
+        """Versioned URL of GET /api/auth/me/avatar, so clients can cache it for good."""
+        if self.avatar_etag:
+            return f"/api/auth/me/avatar?v={self.avatar_etag}"
+        return None
+
     def __repr__(self):
         return f"<User {self.email}>"
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, date
 
 
 class AccountCreate(BaseModel):
@@ -34,3 +34,9 @@ class AccountResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BalancePoint(BaseModel):
+    """Account balance at the end of a day."""
+    date: date
+    balance: float
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 
 class DeviceTrustRequest(BaseModel):
@@ -12,3 +13,16 @@ class TrustedDeviceResponse(BaseModel):
     device_token: str
     expires_at: datetime
     message: str
+
+
+class TrustedDeviceInfo(BaseModel):
+    """Schema for a trusted device in the device list (without its token)."""
+    id: str
+    device_info: Optional[str] = None
+    ip_address: Optional[str] = None
+    last_used: Optional[datetime] = None
+    expires_at: datetime
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
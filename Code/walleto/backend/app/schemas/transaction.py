@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, date
+from app.core.periods import to_naive_utc
 
 
 class TransactionCreate(BaseModel):
@@ -13,6 +14,11 @@ class TransactionCreate(BaseModel):
     notes: Optional[str] = None
     transaction_date: Optional[datetime] = None
 
+    @field_validator("transaction_date")
+    @classmethod
+    def normalize_transaction_date(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return to_naive_utc(value) if value is not None else None
+
 
 class TransactionUpdate(BaseModel):
     """Schema for updating a transaction."""
@@ -24,6 +30,11 @@ class TransactionUpdate(BaseModel):
     notes: Optional[str] = None
     transaction_date: Optional[datetime] = None
 
+    @field_validator("transaction_date")
+    @classmethod
+    def normalize_transaction_date(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return to_naive_utc(value) if value is not None else None
+
 
 class TransactionResponse(BaseModel):
     """Schema for transaction response."""
@@ -49,3 +60,21 @@ class TransactionWithDetails(TransactionResponse):
     category_color: Optional[str] = None
     category_icon: Optional[str] = None
     account_name: Optional[str] = None
+
+
+class TransactionImportResult(BaseModel):
+    """Outcome of a bank-statement import."""
+    imported: int
+    duplicates: int
+    balance: float
+
+
+class PeriodSummary(BaseModel):
+    """Income and expense totals for one day, month or year."""
+    period_start: date
+    year: int
+    month: Optional[int] = None
+    day: Optional[int] = None
+    income: float
+    expenses: float
+    net: float
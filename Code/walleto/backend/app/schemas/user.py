@@ -22,7 +22,7 @@ class UserLogin(BaseModel):
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     nickname: Optional[str] = None
-    profile_picture: Optional[str] = None
+    profile_picture: Optional[str] = None  # Base64 image or data: URL; "" removes it
     birthdate: Optional[date] = None
     secondary_email: Optional[str] = None
     phone_number: Optional[str] = None
@@ -41,7 +41,7 @@ class UserResponse(BaseModel):
     last_name: str
     username: Optional[str] = None
     nickname: Optional[str] = None
-    profile_picture: Optional[str] = None
+    avatar_url: Optional[str] = None  # Served by GET /auth/me/avatar
     birthdate: Optional[date] = None
     secondary_email: Optional[str] = None
     phone_number: Optional[str] = None
@@ -58,6 +58,17 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class Principal(BaseModel):
+    """Slim identity of the authenticated user, resolved on every request."""
+    id: str
+    email: str
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -0,0 +1,454 @@
+"""
+Generate realistic synthetic users with large transaction histories.
+
+Usage:
+    python -m app.scripts.generate_data --users 10 --transactions 1000000 [--workers 8] [--seed 42]
+
+Each user gets accounts, income and expense categories, monthly budgets and
+a transaction history over --months ending today: recurring salary, rent,
+utilities and subscriptions, plus day-to-day spending with seasonal
+categories, busier weekends and a few merchants taking most of the volume.
+
+Output is deterministic: user n is generated from (--seed, n) alone, so the
+same arguments give the same ids and values whatever --workers is; dates
+are relative to the run's start unless --end-date pins them. Users whose email
+already exists are skipped and each user commits in one transaction, so an
+interrupted run can simply be restarted. Month-end balance checkpoints are
+written too, so balance history never replays a whole account. Writes go
+to DATABASE_URL; use several workers against Postgres (SQLite allows one
+writer at a time). benchmarks.dataset seeds its datasets through here.
+"""
+from dataclasses import asdict, dataclass
+from collections import defaultdict
+from datetime import date, datetime, time as day_time, timedelta
+from typing import Iterator, List, Optional
+import argparse
+import logging
+import multiprocessing
+import random
+import time
+import uuid
+
+# Expense categories: share of day-to-day spending, lognormal amount (mu, sigma),
+# monthly seasonality (Jan..Dec) and weekend multiplier
+EXPENSE_PROFILES = [
+    {"name": "Groceries", "share": 30, "amount": (3.6, 0.6), "weekend": 1.4,
+     "season": (1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1.1, 1.3),
+     "merchants": ["FreshMart", "City Market", "Corner Store", "Organic Hub", "Bulk Barn", "Night Grocer"]},
+    {"name": "Dining", "share": 20, "amount": (3.0, 0.7), "weekend": 1.8,
+     "season": (0.8, 0.9, 1, 1, 1.1, 1.2, 1.2, 1.2, 1, 1, 1, 1.3),
+     "merchants": ["Cafe Luna", "Burger Barn", "Sushi Go", "Pizza Plaza", "Taco Stand", "Noodle House", "Bistro 9"]},
+    {"name": "Transport", "share": 15, "amount": (2.8, 0.8), "weekend": 0.7,
+     "season": (1, 1, 1, 1, 1, 1, 0.9, 0.9, 1, 1, 1, 1),
+     "merchants": ["Metro", "RideShare", "Fuel Stop", "City Parking", "Bike Share"]},
+    {"name": "Shopping", "share": 12, "amount": (3.8, 1.0), "weekend": 1.6,
+     "season": (0.9, 0.7, 0.8, 0.9, 0.9, 1, 1, 1.1, 1, 1, 1.6, 2.0),
+     "merchants": ["MegaStore", "Online Mart", "Book Nook", "Tech World", "Fashion Lane", "Home Goods"]},
+    {"name": "Entertainment", "share": 8, "amount": (3.2, 0.8), "weekend": 2.0,
+     "season": (0.9, 0.9, 1, 1, 1, 1.2, 1.3, 1.2, 1, 1, 1, 1.2),
+     "merchants": ["Cinema City", "Game Shop", "Concert Hall", "Bowling Alley"]},
+    {"name": "Health", "share": 6, "amount": (3.5, 0.9), "weekend": 0.5,
+     "season": (1.3, 1.2, 1, 1, 0.9, 0.9, 0.9, 0.9, 1, 1.1, 1.2, 1.2),
+     "merchants": ["Pharmacy Plus", "City Clinic", "Dental Care", "Gym Club"]},
+    {"name": "Travel", "share": 4, "amount": (5.0, 1.0), "weekend": 1.2,
+     "season": (0.5, 0.6, 0.8, 0.9, 1, 1.6, 2.2, 2.0, 0.9, 0.7, 0.7, 1.6),
+     "merchants": ["Airline", "Hotel Stay", "Car Rental", "Travel Agency"]},
+    {"name": "Gifts", "share": 5, "amount": (3.5, 0.8), "weekend": 1.3,
+     "season": (0.6, 1.4, 0.8, 0.8, 1.2, 0.8, 0.8, 0.8, 0.8, 0.8, 1.2, 3.0),
+     "merchants": ["Gift Corner", "Flower Shop", "Online Mart"]},
+]
+
+# Monthly bills: (category, description, day of month, amount range)
+RECURRING_BILLS = [
+    ("Rent", "Monthly rent", 1, (900, 2500)),
+    ("Utilities", "Power Co", 8, (60, 160)),
+    ("Utilities", "Water Works", 12, (25, 60)),
+    ("Utilities", "FastNet Internet", 15, (40, 90)),
+    ("Subscriptions", "StreamFlix", 5, (9, 18)),
+    ("Subscriptions", "Music Plus", 20, (5, 12)),
+    ("Subscriptions", "Cloud Storage", 25, (2, 10)),
+]
+# Winter heating and summer cooling
+UTILITY_SEASON = (1.5, 1.4, 1.1, 0.9, 0.8, 1.0, 1.3, 1.3, 0.9, 0.9, 1.1, 1.4)
+
+INCOME_CATEGORIES = ["Salary", "Freelance", "Interest"]
+ACCOUNT_TYPES = [("Checking", "checking"), ("Credit Card", "credit_card"), ("Savings", "savings"), ("Cash", "cash")]
+
+# Merchant popularity falls off as 1 / rank ** MERCHANT_SKEW
+MERCHANT_SKEW = 1.2
+
+
+@dataclass(frozen=True)
+class GeneratorSpec:
+    users: int = 1
+    transactions: int = 100000  # per user
+    months: int = 24
+    seed: int = 42
+    accounts: int = 4  # per user, at most len(ACCOUNT_TYPES)
+    email_prefix: str = "synthetic"
+    first_user: int = 0
+    password_hash: Optional[str] = None
+    batch_size: int = 10000
+    end_date: Optional[date] = None  # last day of history; default today
+
+
+def user_email(spec: GeneratorSpec, n: int) -> str:
+    return f"{spec.email_prefix}-{n}@example.com"
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _month_starts(start: date, end: date) -> List[date]:
+    months = []
+    current = start.replace(day=1)
+    while current <= end:
+        months.append(current)
+        current = (current + timedelta(days=32)).replace(day=1)
+    return months
+
+
+class UserGenerator:
+    """All rows of one synthetic user, drawn from a private RNG in a fixed order."""
+
+    def __init__(self, spec: GeneratorSpec, n: int, now: datetime):
+        self.spec = spec
+        self.rng = random.Random(f"{spec.seed}-{n}")
+        self.now = now
+        self.start = now - timedelta(days=round(spec.months * 30.44))
+        self.span_seconds = int((now - self.start).total_seconds())
+        rng = self.rng
+
+        self.user = {
+            "id": _uuid(rng),
+            "email": user_email(spec, n),
+            "hashed_password": spec.password_hash,
+            "first_name": "Synthetic",
+            "last_name": f"User {n}",
+            "onboarding_completed": True,
+        }
+        user_id = self.user["id"]
+
+        self.accounts = [
+            {"id": _uuid(rng), "user_id": user_id, "name": name, "type": account_type, "balance": 0.0}
+            for name, account_type in ACCOUNT_TYPES[:max(1, min(spec.accounts, len(ACCOUNT_TYPES)))]
+        ]
+        self.balances = {account["id"]: 0.0 for account in self.accounts}
+        # Net change per (account, year, month), for month-end checkpoints
+        self.monthly_net = defaultdict(float)
+        self.checking = self.accounts[0]["id"]
+        self.savings = next((a["id"] for a in self.accounts if a["type"] == "savings"), self.checking)
+        # Day-to-day spending goes mostly on the card when there is one
+        spending = [a for a in self.accounts if a["type"] in ("checking", "credit_card", "cash")]
+        self.spending_accounts = [a["id"] for a in spending]
+        self.spending_weights = [{"checking": 3, "credit_card": 6, "cash": 1}[a["type"]] for a in spending]
+
+        self.categories = {}
+        for name in [p["name"] for p in EXPENSE_PROFILES] + sorted({bill[0] for bill in RECURRING_BILLS}):
+            self.categories[name] = {"id": _uuid(rng), "user_id": user_id, "name": name, "type": "expense"}
+        for name in INCOME_CATEGORIES:
+            self.categories[name] = {"id": _uuid(rng), "user_id": user_id, "name": name, "type": "income"}
+
+        self.cum_shares = []
+        total = 0
+        for profile in EXPENSE_PROFILES:
+            total += profile["share"]
+            self.cum_shares.append(total)
+        self.merchant_weights = {
+            p["name"]: [1 / rank ** MERCHANT_SKEW for rank in range(1, len(p["merchants"]) + 1)]
+            for p in EXPENSE_PROFILES
+        }
+        # Each user spends at their own scale
+        self.spend_scale = rng.lognormvariate(0, 0.3)
+        self.rent = round(rng.uniform(*RECURRING_BILLS[0][3]), 2)
+        self.salary = round(rng.uniform(2500, 7000), 2)
+        self.biweekly = rng.random() < 0.4
+
+    def _transaction(self, category: str, account_id: str, amount: float, description: str, when: datetime) -> dict:
+        category_row = self.categories[category]
+        amount = round(amount, 2)
+        signed = amount if category_row["type"] == "income" else -amount
+        self.balances[account_id] += signed
+        self.monthly_net[(account_id, when.year, when.month)] += signed
+        return {
+            "id": _uuid(self.rng),
+            "user_id": self.user["id"],
+            "account_id": account_id,
+            "category_id": category_row["id"],
+            "type": category_row["type"],
+            "amount": amount,
+            "description": description,
+            "notes": None,
+            "transaction_date": when,
+            "created_at": when,
+        }
+
+    def _recurring(self) -> List[dict]:
+        rng = self.rng
+        rows = []
+        start, end = self.start.date(), self.now.date()
+        bill_amounts = {bill[1]: rng.uniform(*bill[3]) for bill in RECURRING_BILLS[1:]}
+
+        for month_start in _month_starts(start, end):
+            years_in = (month_start - start).days / 365
+            for category, description, day, _ in RECURRING_BILLS:
+                when = datetime.combine(month_start.replace(day=day), datetime.min.time()).replace(hour=9)
+                if not (self.start <= when <= self.now):
+                    continue
+                if category == "Rent":
+                    amount = self.rent * 1.03 ** int(years_in)
+                elif category == "Utilities":
+                    amount = bill_amounts[description] * UTILITY_SEASON[month_start.month - 1] * rng.uniform(0.9, 1.1)
+                else:
+                    amount = bill_amounts[description]
+                rows.append(self._transaction(category, self.checking, amount, description, when))
+
+            # Salary with a raise every year; interest on savings
+            salary = self.salary * 1.04 ** int(years_in)
+            paydays = (1, 15) if self.biweekly else (28,)
+            for day in paydays:
+                when = datetime.combine(month_start.replace(day=day), datetime.min.time()).replace(hour=6)
+                if self.start <= when <= self.now:
+                    rows.append(self._transaction(
+                        "Salary", self.checking, salary / len(paydays), "Employer payroll", when
+                    ))
+            when = datetime.combine(month_start.replace(day=28), datetime.min.time())
+            if self.start <= when <= self.now:
+                rows.append(self._transaction("Interest", self.savings, rng.uniform(1, 40), "Savings interest", when))
+            if rng.random() < 0.25:
+                when = self.start + timedelta(seconds=rng.randrange(self.span_seconds))
+                rows.append(self._transaction(
+                    "Freelance", self.checking, rng.uniform(200, 2500), "Client invoice", when
+                ))
+
+        return rows
+
+    def _spending(self, count: int) -> Iterator[dict]:
+        rng = self.rng
+        start = self.start
+        for _ in range(count):
+            profile = EXPENSE_PROFILES[rng.choices(range(len(EXPENSE_PROFILES)), cum_weights=self.cum_shares)[0]]
+            season, weekend = profile["season"], profile["weekend"]
+            ceiling = max(season) * max(weekend, 1)
+            # Rejection sampling over the period by seasonality and weekday
+            while True:
+                when = start + timedelta(seconds=rng.randrange(self.span_seconds))
+                weight = season[when.month - 1] * (weekend if when.weekday() >= 5 else 1)
+                if rng.random() * ceiling < weight:
+                    break
+            merchant = rng.choices(profile["merchants"], weights=self.merchant_weights[profile["name"]])[0]
+            account = rng.choices(self.spending_accounts, weights=self.spending_weights)[0]
+            amount = rng.lognormvariate(*profile["amount"]) * self.spend_scale
+            yield self._transaction(profile["name"], account, amount, merchant, when)
+
+    def budgets(self) -> List[dict]:
+        """Monthly budgets for the everyday categories, around the user's typical spend."""
+        rows = []
+        for month_start in _month_starts(self.start.date(), self.now.date()):
+            for profile in EXPENSE_PROFILES[:5]:
+                rows.append({
+                    "id": _uuid(self.rng),
+                    "user_id": self.user["id"],
+                    "category_id": self.categories[profile["name"]]["id"],
+                    "amount": float(round(self.rng.uniform(150, 900) * self.spend_scale, -1) or 50),
+                    "month": month_start.month,
+                    "year": month_start.year,
+                    "alert_threshold": 80.0,
+                })
+        return rows
+
+    def checkpoints(self) -> List[dict]:
+        """Balance at the end of every finished month, derived from the final balances; call after transactions()."""
+        rows = []
+        month_starts = _month_starts(self.start.date(), self.now.date())
+        for account_id, balance in self.balances.items():
+            # Walk back from the final balance, undoing one month at a time
+            for month_start in reversed(month_starts):
+                month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+                if month_end < self.now.date():
+                    rows.append({
+                        "id": _uuid(self.rng),
+                        "account_id": account_id,
+                        "as_of": month_end,
+                        "balance": round(balance, 2),
+                    })
+                balance -= self.monthly_net[(account_id, month_start.year, month_start.month)]
+        return rows
+
+    def transactions(self) -> Iterator[List[dict]]:
+        """Transactions in batches of spec.batch_size; recurring ones count towards the total."""
+        batch = self._recurring()[:self.spec.transactions]
+        for row in self._spending(self.spec.transactions - len(batch)):
+            batch.append(row)
+            if len(batch) >= self.spec.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def generate_user(spec: GeneratorSpec, n: int, now: datetime) -> Optional[dict]:
+    """
+    Write user n and all their rows in one transaction.
+
+    Returns:
+        dict: The user's id and email plus row counts, or None if the user already existed
+    """
+    from sqlalchemy import bindparam, insert, update
+    from app.core.database import SessionLocal
+    from app import models
+    from app.models.user import User
+    from app.models.account import Account
+    from app.models.category import Category
+    from app.models.budget import Budget
+    from app.models.transaction import Transaction
+    from app.models.balance_checkpoint import BalanceCheckpoint
+    from app.services.rollup_service import rebuild_rollups
+
+    generator = UserGenerator(spec, n, now)
+    db = SessionLocal()
+    try:
+        if db.query(User.id).filter(User.email == generator.user["email"]).first():
+            return None
+
+        db.execute(insert(User.__table__), [generator.user])
+        db.execute(insert(Account.__table__), generator.accounts)
+        db.execute(insert(Category.__table__), list(generator.categories.values()))
+        budgets = generator.budgets()
+        db.execute(insert(Budget.__table__), budgets)
+
+        written = 0
+        for batch in generator.transactions():
+            db.execute(insert(Transaction.__table__), batch)
+            written += len(batch)
+
+        accounts = Account.__table__
+        db.execute(
+            update(accounts).where(accounts.c.id == bindparam("account_id")).values(balance=bindparam("new_balance")),
+            [{"account_id": key, "new_balance": round(value, 2)} for key, value in generator.balances.items()]
+        )
+        checkpoints = generator.checkpoints()
+        if checkpoints:
+            db.execute(insert(BalanceCheckpoint.__table__), checkpoints)
+        db.commit()
+
+        # Rollups commit on their own; a rerun of rebuild_rollups repairs a crash in between
+        rebuild_rollups(db, generator.user["id"])
+        return {
+            "id": generator.user["id"],
+            "email": generator.user["email"],
+            "transactions": written,
+            "budgets": len(budgets),
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _generate_user_task(task) -> tuple:
+    spec, n, now = task
+    return n, generate_user(GeneratorSpec(**spec), n, now)
+
+
+def generate(spec: GeneratorSpec, workers: int = 1, progress=None) -> List[dict]:
+    """
+    Generate users first_user .. first_user + users - 1, in parallel processes if workers > 1.
+
+    Returns:
+        list: One dict per user created (skipped users are left out), in user order
+    """
+    from app.core.database import engine, Base
+    from app import models
+
+    Base.metadata.create_all(bind=engine)
+    if spec.end_date:
+        now = datetime.combine(spec.end_date, day_time(23, 59, 59))
+    else:
+        now = datetime.now().replace(microsecond=0)
+    tasks = [(asdict(spec), n, now) for n in range(spec.first_user, spec.first_user + spec.users)]
+    created = {}
+
+    def collect(n, user):
+        if user:
+            created[n] = user
+        if progress:
+            progress(n, user)
+
+    if workers <= 1:
+        for task in tasks:
+            collect(*_generate_user_task(task))
+    else:
+        # spawn: each worker builds its own engine instead of inheriting pooled connections
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            for n, user in pool.imap_unordered(_generate_user_task, tasks):
+                collect(n, user)
+
+    return [created[n] for n in sorted(created)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--transactions", type=int, default=100000, help="Transactions per user")
+    parser.add_argument("--months", type=int, default=24, help="Months of history")
+    parser.add_argument(
+        "--end-date", type=date.fromisoformat, help="Last day of history, YYYY-MM-DD (default: today)"
+    )
+    parser.add_argument("--accounts", type=int, default=4, help=f"Accounts per user (1-{len(ACCOUNT_TYPES)})")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="Parallel processes, one user at a time each")
+    parser.add_argument("--first-user", type=int, default=0, help="Index of the first user, to extend a dataset")
+    parser.add_argument("--email-prefix", default="synthetic")
+    parser.add_argument("--password", default="synthetic-password", help="Password of every generated user")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per INSERT")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    from sqlalchemy.engine import make_url
+    from app.core.config import settings
+    from app.core.security import get_password_hash
+
+    workers = args.workers
+    if workers > 1 and make_url(settings.DATABASE_URL).get_backend_name() == "sqlite":
+        print("SQLite allows a single writer; using one worker")
+        workers = 1
+
+    spec = GeneratorSpec(
+        users=args.users,
+        transactions=args.transactions,
+        months=args.months,
+        seed=args.seed,
+        accounts=args.accounts,
+        email_prefix=args.email_prefix,
+        first_user=args.first_user,
+        password_hash=get_password_hash(args.password),
+        batch_size=args.batch_size,
+        end_date=args.end_date,
+    )
+
+    started = time.perf_counter()
+    totals = {"users": 0, "transactions": 0}
+
+    def progress(n, user):
+        if user is None:
+            print(f"{user_email(spec, n)} exists, skipped")
+            return
+        totals["users"] += 1
+        totals["transactions"] += user["transactions"]
+        elapsed = time.perf_counter() - started
+        print(
+            f"{user['email']}: {user['transactions']} transactions "
+            f"({totals['users']}/{spec.users} users, {totals['transactions'] / elapsed:,.0f} rows/s)"
+        )
+
+    generate(spec, workers, progress)
+    elapsed = time.perf_counter() - started
+    print(f"Created {totals['users']} users and {totals['transactions']} transactions in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Move profile pictures stored inline on users into user_avatars.
+
+Usage:
+    python -m app.scripts.migrate_avatars
+
+Run once after deploying user_avatars; until then those users have no
+avatar_url. Pictures that are not valid images are dropped. Safe to rerun.
+"""
+import argparse
+import logging
+from app.core.database import SessionLocal, engine, Base
+from app.services.avatar_service import migrate_legacy_avatars
+
+# Import all models to ensure they're registered with Base
+from app import models
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move inline profile pictures into user_avatars.")
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        migrated = migrate_legacy_avatars(db)
+        print(f"Migrated {migrated} profile pictures")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
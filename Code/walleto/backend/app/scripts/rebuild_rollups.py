@@ -0,0 +1,36 @@
+"""
+Rebuild the monthly_rollups table from raw transactions.
+
+Usage:
+    python -m app.scripts.rebuild_rollups [--user-id USER_ID]
+
+Running API workers notice the rebuilt totals through the affected users'
+data versions; their in-process caches need no restart.
+"""
+import argparse
+import logging
+from app.core.database import SessionLocal, engine, Base
+from app.services.rollup_service import rebuild_rollups
+
+# Import all models to ensure they're registered with Base
+from app import models
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild monthly spending rollups from transactions.")
+    parser.add_argument("--user-id", help="Only rebuild rollups for this user")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        written = rebuild_rollups(db, args.user_id)
+        print(f"Wrote {written} rollup rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import update
 from fastapi import HTTPException, status
 from app.models.account import Account
 from app.schemas.account import AccountCreate, AccountUpdate
-from typing import List, Optional
+from app.core.cache import dashboard_cache
+from app.services.data_version_service import bump_data_version
+from typing import Dict, List, Optional
 
 
 def create_account(db: Session, user_id: str, data: AccountCreate) -> Account:
@@ -16,7 +19,9 @@ def create_account(db: Session, user_id: str, data: AccountCreate) -> Account:
     )
 
     db.add(account)
+    bump_data_version(db, user_id, "account")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     db.refresh(account)
     return account
 
@@ -63,7 +68,9 @@ def update_account(db: Session, user_id: str, account_id: str, data: AccountUpda
     if data.is_active is not None:
         account.is_active = data.is_active
 
+    bump_data_version(db, user_id, "account")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     db.refresh(account)
     return account
 
@@ -73,7 +80,9 @@ def delete_account(db: Session, user_id: str, account_id: str):
     account = get_account(db, user_id, account_id)
 
     db.delete(account)
+    bump_data_version(db, user_id, "account")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     return {"message": "Account deleted successfully"}
 
 
@@ -87,3 +96,42 @@ def get_total_balance(db: Session, user_id: str) -> float:
     ).scalar()
 
     return float(total) if total else 0.0
+
+
+def signed_amount(type: str, amount: float) -> float:
+    """Balance effect of a transaction: income adds, expense subtracts."""
+    return amount if type == "income" else -amount
+
+
+def adjust_balance(db: Session, account_id: str, delta: float, user_id: Optional[str] = None) -> Optional[float]:
+    """
+    Atomically add delta to an account balance and return the new balance.
+
+    A single UPDATE ... SET balance = balance + delta means concurrent writers
+    never overwrite each other. Returns None if the account doesn't exist
+    (or doesn't belong to user_id when given).
+    """
+    statement = update(Account).where(Account.id == account_id)
+    if user_id:
+        statement = statement.where(Account.user_id == user_id)
+
+    result = db.execute(
+        statement.values(balance=Account.balance + delta).returning(Account.balance),
+        execution_options={"synchronize_session": False}
+    ).first()
+
+    return result[0] if result else None
+
+
+def apply_balance_deltas(db: Session, deltas: Dict[str, float], user_id: Optional[str] = None) -> Dict[str, Optional[float]]:
+    """
+    Apply several balance deltas, locking accounts in id order.
+
+    A consistent lock order keeps two transfers between the same pair of
+    accounts from deadlocking. Zero deltas are skipped.
+    """
+    balances = {}
+    for account_id in sorted(deltas):
+        if deltas[account_id]:
+            balances[account_id] = adjust_balance(db, account_id, deltas[account_id], user_id)
+    return balances
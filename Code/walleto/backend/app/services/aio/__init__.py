@@ -0,0 +1,17 @@
+"""
+Async counterparts of the financial services, for handlers on AsyncSession.
+
+Each function runs the sync service unchanged through AsyncSession.run_sync:
+the ORM code executes in a greenlet on the event loop and every round trip
+goes through the async driver, so no threadpool slot is held while waiting
+on the database. The business logic stays in one place.
+"""
+from app.services.aio import (
+    category_service,
+    budget_service,
+    account_service,
+    balance_history_service,
+    transaction_service,
+    dashboard_service,
+    data_version_service,
+)
@@ -0,0 +1,8 @@
+from app.services import account_service
+from app.services.aio.base import in_session
+
+create_account = in_session(account_service.create_account)
+get_accounts = in_session(account_service.get_accounts)
+get_account = in_session(account_service.get_account)
+update_account = in_session(account_service.update_account)
+delete_account = in_session(account_service.delete_account)
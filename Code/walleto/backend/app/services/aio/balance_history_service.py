@@ -0,0 +1,4 @@
+from app.services import balance_history_service
+from app.services.aio.base import in_session
+
+get_balance_history = in_session(balance_history_service.get_balance_history)
@@ -0,0 +1,12 @@
+from functools import wraps
+from typing import Callable
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def in_session(service: Callable) -> Callable:
+    """Wrap a sync `service(db, ...)` as `await fn(async_db, ...)`."""
+    @wraps(service)
+    async def run(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(service, *args, **kwargs)
+
+    return run
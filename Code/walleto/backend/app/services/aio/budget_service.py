@@ -0,0 +1,8 @@
+from app.services import budget_service
+from app.services.aio.base import in_session
+
+create_budget = in_session(budget_service.create_budget)
+get_budgets = in_session(budget_service.get_budgets)
+get_budget = in_session(budget_service.get_budget)
+update_budget = in_session(budget_service.update_budget)
+delete_budget = in_session(budget_service.delete_budget)
@@ -0,0 +1,8 @@
+from app.services import category_service
+from app.services.aio.base import in_session
+
+create_category = in_session(category_service.create_category)
+get_categories = in_session(category_service.get_categories)
+get_category = in_session(category_service.get_category)
+update_category = in_session(category_service.update_category)
+delete_category = in_session(category_service.delete_category)
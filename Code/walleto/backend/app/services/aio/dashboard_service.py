@@ -0,0 +1,4 @@
+from app.services import dashboard_service
+from app.services.aio.base import in_session
+
+get_dashboard_data = in_session(dashboard_service.get_dashboard_data)
@@ -0,0 +1,4 @@
+from app.services import data_version_service
+from app.services.aio.base import in_session
+
+get_data_version = in_session(data_version_service.get_data_version)
@@ -0,0 +1,11 @@
+from app.services import transaction_service
+from app.services.aio.base import in_session
+
+create_transaction = in_session(transaction_service.create_transaction)
+get_transactions = in_session(transaction_service.get_transactions)
+search_transactions = in_session(transaction_service.search_transactions)
+get_transaction = in_session(transaction_service.get_transaction)
+update_transaction = in_session(transaction_service.update_transaction)
+delete_transaction = in_session(transaction_service.delete_transaction)
+get_monthly_summary = in_session(transaction_service.get_monthly_summary)
+get_period_summaries = in_session(transaction_service.get_period_summaries)
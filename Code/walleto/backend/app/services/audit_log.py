@@ -0,0 +1,101 @@
+from sqlalchemy import insert
+from app.core.database import SessionLocal
+from app.core.config import settings
+from app.models.otp import OTPAttempt
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """
+    Write audit rows for a model in the background, in batches.
+
+    Requests only append a dict to an in-memory queue; one thread inserts
+    whatever has accumulated every flush interval (or as soon as a batch is
+    full) in a single executemany. Rows are dropped with a warning when the
+    queue is full: audit logging must never slow down or fail a request.
+    """
+
+    def __init__(self, model, batch_size: int, flush_seconds: float, max_queue: int):
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def start(self):
+        """Start the writer thread (idempotent)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"audit-{self.model.__tablename__}", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush pending rows and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def add(self, **values):
+        """Queue one row; callers should set created_at themselves."""
+        self.start()
+        try:
+            self._queue.put_nowait(values)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning(f"Audit queue for {self.model.__tablename__} full; row dropped")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped}
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                row = self._queue.get(timeout=self.flush_seconds)
+                while row is not None:
+                    batch.append(row)
+                    if len(batch) >= self.batch_size:
+                        break
+                    row = self._queue.get_nowait()
+                stopping = row is None
+            except queue.Empty:
+                pass
+
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list):
+        db = SessionLocal()
+        try:
+            db.execute(insert(self.model), batch)
+            db.commit()
+            with self._lock:
+                self.written += len(batch)
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self.dropped += len(batch)
+            logger.error(f"Failed to write {len(batch)} {self.model.__tablename__} rows: {str(e)}")
+        finally:
+            db.close()
+
+
+# OTP generate/verify attempts; kept for audit only, rate limits no longer read them
+otp_attempt_log = AuditLogWriter(
+    OTPAttempt,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_seconds=settings.AUDIT_FLUSH_SECONDS,
+    max_queue=settings.AUDIT_QUEUE_MAX
+)
@@ -1,8 +1,17 @@
 from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
+from fastapi import HTTPException, status, Request
 from app.models.user import User
-from app.schemas.user import UserCreate, UserLogin, UserUpdate
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.schemas.user import UserCreate, UserLogin, UserUpdate, Principal
+from app.core.security import verify_password, get_password_hash, needs_rehash, create_access_token
+from app.core.hashing import password_hasher
+from app.core.cache import principal_cache
+from app.core.config import settings
+from app.core.rate_limit import RateLimit, enforce_rate_limit
+from app.services.avatar_service import set_avatar
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def get_user_by_email(db: Session, email: str) -> User:
@@ -15,18 +24,39 @@ def get_user_by_id(db: Session, user_id: str) -> User:
     return db.query(User).filter(User.id == user_id).first()
 
 
-def create_user(db: Session, user_data: UserCreate) -> User:
-    """Create a new user."""
-    # Check if user already exists
-    existing_user = get_user_by_email(db, user_data.email)
-    if existing_user:
+def get_principal(db: Session, user_id: str) -> Optional[Principal]:
+    """
+    Get the slim identity of a user, cached per user id.
+
+    Reads only id, email and is_active, never the full row. Writers that
+    change any of them (or the password) call principal_cache.invalidate().
+    """
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    token = principal_cache.reserve(user_id)
+    try:
+        row = db.query(User.id, User.email, User.is_active).filter(User.id == user_id).first()
+        if not row:
+            return None
+
+        principal = Principal(id=row.id, email=row.email, is_active=bool(row.is_active))
+        principal_cache.put(user_id, principal, token)
+        return principal
+    finally:
+        principal_cache.release(user_id, token)
+
+
+def _ensure_email_available(db: Session, email: str):
+    if get_user_by_email(db, email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+
+def _add_user(db: Session, user_data: UserCreate, hashed_password: str) -> User:
     db_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -40,9 +70,32 @@ def create_user(db: Session, user_data: UserCreate) -> User:
     return db_user
 
 
-def authenticate_user(db: Session, credentials: UserLogin) -> User:
-    """Authenticate user with email and password."""
-    user = get_user_by_email(db, credentials.email)
+def create_user(db: Session, user_data: UserCreate) -> User:
+    """Create a new user."""
+    # Check if user already exists
+    _ensure_email_available(db, user_data.email)
+
+    # Create new user
+    return _add_user(db, user_data, get_password_hash(user_data.password))
+
+
+def create_user_pooled(db: Session, user_data: UserCreate) -> User:
+    """Create a new user from a worker thread, hashing the password in the hashing pool."""
+    _ensure_email_available(db, user_data.email)
+    return _add_user(db, user_data, password_hasher.hash_from_thread(user_data.password))
+
+
+def check_signin_rate_limit(email: str, request: Request):
+    """Count a password sign-in attempt against the per-email and per-IP limits."""
+    ip = request.client.host if request.client else "unknown"
+    enforce_rate_limit([
+        RateLimit(f"signin:email:{email.lower()}", settings.SIGNIN_PER_EMAIL, settings.RATE_LIMIT_WINDOW_SECONDS),
+        RateLimit(f"signin:ip:{ip}", settings.SIGNIN_PER_IP, settings.RATE_LIMIT_WINDOW_SECONDS),
+    ], "Too many sign-in attempts. Please wait a few minutes before trying again.")
+
+
+def _password_user(db: Session, email: str) -> User:
+    user = get_user_by_email(db, email)
 
     if not user:
         raise HTTPException(
@@ -56,7 +109,11 @@ def authenticate_user(db: Session, credentials: UserLogin) -> User:
             detail="Please sign in with Google"
         )
 
-    if not verify_password(credentials.password, user.hashed_password):
+    return user
+
+
+def _check_signin(user: User, password_ok: bool):
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -68,6 +125,34 @@ def authenticate_user(db: Session, credentials: UserLogin) -> User:
             detail="Account is inactive"
         )
 
+
+def _store_rehash(db: Session, user: User, hashed_password: str):
+    """Replace a hash made at an old BCRYPT_ROUNDS cost after a successful login."""
+    user.hashed_password = hashed_password
+    db.commit()
+    db.refresh(user)
+    logger.info(f"Password hash for user {user.id} upgraded to cost {settings.BCRYPT_ROUNDS}")
+
+
+def authenticate_user(db: Session, credentials: UserLogin) -> User:
+    """Authenticate user with email and password."""
+    user = _password_user(db, credentials.email)
+    _check_signin(user, verify_password(credentials.password, user.hashed_password))
+
+    if needs_rehash(user.hashed_password):
+        _store_rehash(db, user, get_password_hash(credentials.password))
+
+    return user
+
+
+def authenticate_user_pooled(db: Session, credentials: UserLogin) -> User:
+    """Authenticate user with email and password from a worker thread, running bcrypt in the hashing pool."""
+    user = _password_user(db, credentials.email)
+    _check_signin(user, password_hasher.verify_from_thread(credentials.password, user.hashed_password))
+
+    if needs_rehash(user.hashed_password):
+        _store_rehash(db, user, password_hasher.hash_from_thread(credentials.password))
+
     return user
 
 
@@ -81,12 +166,15 @@ def update_user_profile(db: Session, user_id: str, update_data: UserUpdate) -> U
             detail="User not found"
         )
 
-    # Update fields
+    # Update fields; the picture goes to user_avatars
     update_dict = update_data.model_dump(exclude_unset=True)
+    if "profile_picture" in update_dict:
+        set_avatar(db, user, update_dict.pop("profile_picture"))
     for field, value in update_dict.items():
         setattr(user, field, value)
 
     db.commit()
+    principal_cache.invalidate(user_id)
     db.refresh(user)
     return user
 
@@ -97,8 +185,7 @@ def create_user_token(user: User) -> str:
     return create_access_token(token_data)
 
 
-def reset_user_password(db: Session, email: str, new_password: str) -> User:
-    """Reset user password."""
+def _reset_target(db: Session, email: str) -> User:
     user = get_user_by_email(db, email)
 
     if not user:
@@ -107,8 +194,25 @@ def reset_user_password(db: Session, email: str, new_password: str) -> User:
             detail="User not found"
         )
 
+    return user
+
+
+def _store_new_password(db: Session, user: User, hashed_password: str) -> User:
     # Update password
-    user.hashed_password = get_password_hash(new_password)
+    user.hashed_password = hashed_password
     db.commit()
+    principal_cache.invalidate(user.id)
     db.refresh(user)
     return user
+
+
+def reset_user_password(db: Session, email: str, new_password: str) -> User:
+    """Reset user password."""
+    user = _reset_target(db, email)
+    return _store_new_password(db, user, get_password_hash(new_password))
+
+
+def reset_user_password_pooled(db: Session, email: str, new_password: str) -> User:
+    """Reset user password from a worker thread, hashing it in the hashing pool."""
+    user = _reset_target(db, email)
+    return _store_new_password(db, user, password_hasher.hash_from_thread(new_password))
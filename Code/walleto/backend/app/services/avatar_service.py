@@ -0,0 +1,173 @@
+from sqlalchemy.orm import Session, undefer
+from fastapi import HTTPException, status
+from typing import Optional, Tuple
+from io import BytesIO
+import base64
+import binascii
+import hashlib
+import logging
+from PIL import Image, ImageOps
+from app.core.config import settings
+from app.models.avatar import UserAvatar
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Accepted uploads, recognised by their leading bytes rather than the data URL
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+}
+
+
+def _content_type(image: bytes) -> Optional[str]:
+    for signature, content_type in IMAGE_SIGNATURES.items():
+        if image.startswith(signature):
+            return content_type
+    if image[:4] == b"RIFF" and image[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def decode_picture(value: str) -> Tuple[bytes, str]:
+    """
+    Decode a base64 picture (optionally a data: URL) and check its size and type.
+
+    Returns:
+        tuple: (image bytes, content type)
+
+    Raises:
+        HTTPException: If the picture is too large or not a supported image
+    """
+    if value.startswith("data:"):
+        value = value.partition(",")[2]
+
+    # Reject before decoding: base64 is 4 characters per 3 bytes
+    if len(value) > settings.AVATAR_MAX_BYTES * 4 // 3 + 4:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Profile picture must be at most {settings.AVATAR_MAX_BYTES // 1024} KB"
+        )
+
+    try:
+        image = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Profile picture must be a base64 encoded image"
+        )
+
+    content_type = _content_type(image)
+    if not content_type:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Profile picture must be a PNG, JPEG, GIF or WebP image"
+        )
+
+    return image, content_type
+
+
+def make_thumbnail(image: bytes) -> Tuple[bytes, str]:
+    """
+    Scale an image down to fit AVATAR_THUMBNAIL_PX square.
+
+    Returns:
+        tuple: (thumbnail bytes, content type)
+    """
+    try:
+        with Image.open(BytesIO(image)) as picture:
+            picture = ImageOps.exif_transpose(picture)
+            picture.thumbnail((settings.AVATAR_THUMBNAIL_PX, settings.AVATAR_THUMBNAIL_PX))
+            output = BytesIO()
+            if picture.mode in ("RGBA", "LA", "P"):
+                picture.save(output, format="PNG", optimize=True)
+                return output.getvalue(), "image/png"
+            picture.convert("RGB").save(output, format="JPEG", quality=85)
+            return output.getvalue(), "image/jpeg"
+    except Exception as e:
+        logger.info(f"Unreadable profile picture: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Profile picture could not be read as an image"
+        )
+
+
+def set_avatar(db: Session, user: User, picture: Optional[str]):
+    """
+    Store (or with an empty picture, remove) a user's avatar; the caller commits.
+
+    Args:
+        db: Database session
+        user: The user
+        picture: Base64 image or data: URL, as sent in UserUpdate.profile_picture
+    """
+    avatar = db.get(UserAvatar, user.id)
+    user.profile_picture = None
+
+    if not picture:
+        if avatar:
+            db.delete(avatar)
+        return
+
+    image, content_type = decode_picture(picture)
+    thumbnail, thumbnail_type = make_thumbnail(image)
+    if not avatar:
+        avatar = UserAvatar(user_id=user.id)
+        db.add(avatar)
+
+    avatar.image = image
+    avatar.content_type = content_type
+    avatar.thumbnail = thumbnail
+    avatar.thumbnail_type = thumbnail_type
+    avatar.etag = hashlib.sha256(image).hexdigest()
+
+
+def migrate_legacy_avatar(db: Session, user_id: str):
+    """Move a profile picture still stored inline on the users row into user_avatars."""
+    user = db.query(User).options(undefer(User.profile_picture)).filter(
+        User.id == user_id,
+        User.profile_picture.isnot(None)
+    ).first()
+    if not user:
+        return
+
+    try:
+        set_avatar(db, user, user.profile_picture)
+    except HTTPException as e:
+        # Stored before uploads were checked; drop rather than serve it
+        logger.warning(f"Dropping legacy profile picture of user {user_id}: {e.detail}")
+        user.profile_picture = None
+    db.commit()
+
+
+def migrate_legacy_avatars(db: Session) -> int:
+    """
+    Move every inline profile picture into user_avatars, one user per commit.
+
+    Returns:
+        int: Number of users migrated
+    """
+    user_ids = [
+        user_id for (user_id,) in db.query(User.id).filter(User.profile_picture.isnot(None)).all()
+    ]
+    for user_id in user_ids:
+        migrate_legacy_avatar(db, user_id)
+    return len(user_ids)
+
+
+def get_avatar(db: Session, user_id: str, thumbnail: bool) -> Optional[Tuple[bytes, str, str]]:
+    """
+    Get a user's avatar image or thumbnail.
+
+    Returns:
+        tuple: (image bytes, content type, etag), or None if the user has no avatar
+    """
+    column = UserAvatar.thumbnail if thumbnail else UserAvatar.image
+    content_type = UserAvatar.thumbnail_type if thumbnail else UserAvatar.content_type
+    row = db.query(column, content_type, UserAvatar.etag).filter(
+        UserAvatar.user_id == user_id
+    ).first()
+
+    return tuple(row) if row else None
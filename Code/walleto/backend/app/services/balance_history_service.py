@@ -0,0 +1,188 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, case, insert, update, delete
+from fastapi import HTTPException, status
+from app.models.account import Account
+from app.models.balance_checkpoint import BalanceCheckpoint
+from app.models.transaction import Transaction
+from app.services.account_service import get_account
+from typing import List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on points returned by one history request
+MAX_HISTORY_POINTS = 3700
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def _as_date(value) -> date:
+    """func.date() returns a date on Postgres and an ISO string on SQLite."""
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _signed_amount_column():
+    return case((Transaction.type == "income", Transaction.amount), else_=-Transaction.amount)
+
+
+def write_balance_checkpoints(db: Session, as_of: Optional[date] = None) -> int:
+    """
+    Snapshot every active account's balance at the end of as_of (default: yesterday).
+
+    The end-of-day balance is the live balance minus everything dated after
+    as_of, computed for all accounts in one grouped query. Existing
+    checkpoints for the same day are replaced. Returns the number written.
+    """
+    as_of = as_of or date.today() - timedelta(days=1)
+    after = _day_start(as_of + timedelta(days=1))
+
+    later = func.coalesce(func.sum(_signed_amount_column()), 0.0)
+
+    # The date bound sits in the join so only later transactions are read
+    rows = db.query(Account.id, Account.balance - later).outerjoin(
+        Transaction, and_(Transaction.account_id == Account.id, Transaction.transaction_date >= after)
+    ).filter(
+        Account.is_active == True
+    ).group_by(Account.id, Account.balance).all()
+
+    db.execute(delete(BalanceCheckpoint).where(BalanceCheckpoint.as_of == as_of))
+    if rows:
+        db.execute(insert(BalanceCheckpoint), [
+            {"account_id": account_id, "as_of": as_of, "balance": float(balance)}
+            for account_id, balance in rows
+        ])
+    db.commit()
+
+    return len(rows)
+
+
+def shift_checkpoints(db: Session, account_id: str, transaction_date: datetime, delta: float):
+    """
+    Keep checkpoints correct when a backdated transaction changes an account.
+
+    Every checkpoint on or after the transaction's day moves by delta; for
+    transactions dated today or later nothing needs to change.
+    """
+    day = transaction_date.date()
+    if day >= date.today():
+        return
+
+    db.execute(
+        update(BalanceCheckpoint).where(
+            BalanceCheckpoint.account_id == account_id,
+            BalanceCheckpoint.as_of >= day
+        ).values(balance=BalanceCheckpoint.balance + delta)
+    )
+
+
+def discard_checkpoints(db: Session, account_id: str, since: date):
+    """Drop checkpoints from a day onward, e.g. after a bulk import of old history."""
+    db.execute(
+        delete(BalanceCheckpoint).where(
+            BalanceCheckpoint.account_id == account_id,
+            BalanceCheckpoint.as_of >= since
+        )
+    )
+
+
+def _running_daily_net(db: Session, account_id: str, start: date, end: Optional[date]) -> List[Tuple[date, float]]:
+    """Running sum (window function) of net amounts per day for days in [start, end)."""
+    day = func.date(Transaction.transaction_date)
+    daily = db.query(
+        day.label("day"),
+        func.sum(_signed_amount_column()).label("net")
+    ).filter(
+        Transaction.account_id == account_id,
+        Transaction.transaction_date >= _day_start(start)
+    )
+    if end:
+        daily = daily.filter(Transaction.transaction_date < _day_start(end))
+    daily = daily.group_by(day).subquery()
+
+    rows = db.query(
+        daily.c.day,
+        func.sum(daily.c.net).over(order_by=daily.c.day)
+    ).order_by(daily.c.day).all()
+
+    return [(_as_date(day), float(running)) for day, running in rows]
+
+
+def _history_points(start: date, end: date, step: str) -> List[date]:
+    """End-of-step dates between start and end; end is always the last point."""
+    points = []
+    if step == "month":
+        current = start
+        while current <= end:
+            next_month = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+            points.append(min(next_month - timedelta(days=1), end))
+            current = next_month
+    else:
+        step_days = 7 if step == "week" else 1
+        current = start + timedelta(days=step_days - 1)
+        while current < end:
+            points.append(current)
+            current += timedelta(days=step_days)
+        points.append(end)
+
+    return points
+
+
+def get_balance_history(
+    db: Session,
+    user_id: str,
+    account_id: str,
+    start: date,
+    end: date,
+    step: str = "day"
+) -> List[dict]:
+    """
+    Get an account's end-of-day balance at each step between start and end.
+
+    Anchors on the nearest checkpoint at or before start and adds a running
+    sum of later transactions. Without one, it anchors on the nearest
+    checkpoint after end (or the live balance) and walks backwards. Either way
+    only the transactions between the anchor and the range are read.
+    """
+    account = get_account(db, user_id, account_id)
+
+    points = _history_points(start, end, step)
+    if len(points) > MAX_HISTORY_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too large for step '{step}'; use a larger step or a shorter range"
+        )
+
+    before = db.query(BalanceCheckpoint).filter(
+        BalanceCheckpoint.account_id == account_id,
+        BalanceCheckpoint.as_of <= start
+    ).order_by(BalanceCheckpoint.as_of.desc()).first()
+
+    if before:
+        # Forward: checkpoint + running net of later days
+        running = _running_daily_net(db, account_id, before.as_of + timedelta(days=1), end + timedelta(days=1))
+        base = before.balance
+    else:
+        after = db.query(BalanceCheckpoint).filter(
+            BalanceCheckpoint.account_id == account_id,
+            BalanceCheckpoint.as_of >= end
+        ).order_by(BalanceCheckpoint.as_of.asc()).first()
+
+        # Backward: anchor balance minus everything between each point and the anchor
+        anchor_balance = after.balance if after else account.balance
+        anchor_end = after.as_of + timedelta(days=1) if after else None
+        running = _running_daily_net(db, account_id, start + timedelta(days=1), anchor_end)
+        base = anchor_balance - (running[-1][1] if running else 0.0)
+
+    history = []
+    cumulative = 0.0
+    index = 0
+    for point in points:
+        while index < len(running) and running[index][0] <= point:
+            cumulative = running[index][1]
+            index += 1
+        history.append({"date": point, "balance": base + cumulative})
+
+    return history
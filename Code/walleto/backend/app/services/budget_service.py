@@ -1,10 +1,12 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
+from sqlalchemy import func, and_
 from fastapi import HTTPException, status
 from app.models.budget import Budget
 from app.models.category import Category
-from app.models.transaction import Transaction
-from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetWithSpending
+from app.models.rollup import MonthlyRollup
+from app.schemas.budget import BudgetCreate, BudgetUpdate
+from app.core.cache import dashboard_cache
+from app.services.data_version_service import bump_data_version
 from typing import List
 from datetime import datetime
 
@@ -47,22 +49,51 @@ def create_budget(db: Session, user_id: str, data: BudgetCreate) -> Budget:
     )
 
     db.add(budget)
+    bump_data_version(db, user_id, "budget")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     db.refresh(budget)
     return budget
 
 
-def get_budgets(db: Session, user_id: str, month: int = None, year: int = None) -> List[BudgetWithSpending]:
-    """Get budgets with actual spending."""
+def get_budgets(db: Session, user_id: str, month: int = None, year: int = None) -> List[dict]:
+    """Get budgets with actual spending, as BudgetWithSpending-shaped dicts."""
     # Default to current month if not specified
     if month is None or year is None:
         now = datetime.now()
         month = month or now.month
         year = year or now.year
 
-    # Get budgets
-    budgets = db.query(Budget, Category).join(
+    # Spending per category for the month, aggregated once for all budgets
+    spending = db.query(
+        MonthlyRollup.category_id.label("category_id"),
+        func.sum(MonthlyRollup.total).label("spent")
+    ).filter(
+        and_(
+            MonthlyRollup.user_id == user_id,
+            MonthlyRollup.type == "expense",
+            MonthlyRollup.year == year,
+            MonthlyRollup.month == month
+        )
+    ).group_by(MonthlyRollup.category_id).subquery()
+
+    # Get budgets with their spending in a single query, as plain rows
+    rows = db.query(
+        Budget.id,
+        Budget.user_id,
+        Budget.category_id,
+        Budget.amount,
+        Budget.month,
+        Budget.year,
+        Budget.alert_threshold,
+        Budget.created_at,
+        Budget.updated_at,
+        spending.c.spent,
+        Category.name.label("category_name")
+    ).join(
         Category, Budget.category_id == Category.id
+    ).outerjoin(
+        spending, spending.c.category_id == Budget.category_id
     ).filter(
         Budget.user_id == user_id,
         Budget.month == month,
@@ -70,41 +101,18 @@ def get_budgets(db: Session, user_id: str, month: int = None, year: int = None)
     ).all()
 
     result = []
-    for budget, category in budgets:
-        # Calculate actual spending for this category in this month
-        spent = db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.category_id == budget.category_id,
-                Transaction.type == "expense",
-                extract('month', Transaction.transaction_date) == month,
-                extract('year', Transaction.transaction_date) == year
-            )
-        ).scalar() or 0.0
-
-        spent = float(spent)
-        remaining = budget.amount - spent
-        percentage = (spent / budget.amount * 100) if budget.amount > 0 else 0
-        is_over_budget = spent > budget.amount
-
-        budget_with_spending = BudgetWithSpending(
-            id=budget.id,
-            user_id=budget.user_id,
-            category_id=budget.category_id,
-            amount=budget.amount,
-            month=budget.month,
-            year=budget.year,
-            alert_threshold=budget.alert_threshold,
-            created_at=budget.created_at,
-            updated_at=budget.updated_at,
+    for row in rows:
+        budget = row._asdict()
+        spent = float(budget.pop("spent") or 0.0)
+        category_name = budget.pop("category_name")
+        budget.update(
             spent=spent,
-            remaining=remaining,
-            percentage=percentage,
-            is_over_budget=is_over_budget,
-            category_name=category.name
+            remaining=budget["amount"] - spent,
+            percentage=(spent / budget["amount"] * 100) if budget["amount"] > 0 else 0,
+            is_over_budget=spent > budget["amount"],
+            category_name=category_name
         )
-
-        result.append(budget_with_spending)
+        result.append(budget)
 
     return result
 
@@ -134,7 +142,9 @@ def update_budget(db: Session, user_id: str, budget_id: str, data: BudgetUpdate)
     if data.alert_threshold is not None:
         budget.alert_threshold = data.alert_threshold
 
+    bump_data_version(db, user_id, "budget")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     db.refresh(budget)
     return budget
 
@@ -144,5 +154,7 @@ def delete_budget(db: Session, user_id: str, budget_id: str):
     budget = get_budget(db, user_id, budget_id)
 
     db.delete(budget)
+    bump_data_version(db, user_id, "budget")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     return {"message": "Budget deleted successfully"}
@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models.category import Category
+from app.models.rollup import MonthlyRollup
 from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.core.cache import dashboard_cache
+from app.services.data_version_service import bump_data_version
 from typing import List, Optional
 
 
@@ -26,7 +29,9 @@ def create_category(db: Session, user_id: str, data: CategoryCreate) -> Category
     )
 
     db.add(category)
+    bump_data_version(db, user_id, "category")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     db.refresh(category)
     return category
 
@@ -81,7 +86,9 @@ def update_category(db: Session, user_id: str, category_id: str, data: CategoryU
     if data.type is not None:
         category.type = data.type
 
+    bump_data_version(db, user_id, "category")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     db.refresh(category)
     return category
 
@@ -90,6 +97,13 @@ def delete_category(db: Session, user_id: str, category_id: str):
     """Delete a category."""
     category = get_category(db, user_id, category_id)
 
+    # Transactions fall back to uncategorized, so their rollup totals do too
+    db.query(MonthlyRollup).filter(
+        MonthlyRollup.category_id == category_id
+    ).update({MonthlyRollup.category_id: None}, synchronize_session=False)
+
     db.delete(category)
+    bump_data_version(db, user_id, "category")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     return {"message": "Category deleted successfully"}
@@ -1,43 +1,27 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
 from app.models.transaction import Transaction
 from app.models.category import Category
 from app.models.account import Account
-from app.schemas.dashboard import DashboardStats, RecentTransactionSummary, DashboardResponse
+from app.schemas.dashboard import DashboardStats, DashboardResponse
 from app.services.account_service import get_total_balance
 from app.services.budget_service import get_budgets
+from app.services.rollup_service import get_month_totals
+from app.core.cache import dashboard_cache
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 
 def get_dashboard_stats(db: Session, user_id: str) -> DashboardStats:
     """Calculate dashboard statistics for current month."""
     now = datetime.now()
-    current_month = now.month
-    current_year = now.year
 
     # Total balance across all accounts
     total_balance = get_total_balance(db, user_id)
 
-    # Current month income
-    monthly_income = db.query(func.sum(Transaction.amount)).filter(
-        and_(
-            Transaction.user_id == user_id,
-            Transaction.type == "income",
-            extract('month', Transaction.transaction_date) == current_month,
-            extract('year', Transaction.transaction_date) == current_year
-        )
-    ).scalar() or 0.0
-
-    # Current month expenses
-    monthly_expenses = db.query(func.sum(Transaction.amount)).filter(
-        and_(
-            Transaction.user_id == user_id,
-            Transaction.type == "expense",
-            extract('month', Transaction.transaction_date) == current_month,
-            extract('year', Transaction.transaction_date) == current_year
-        )
-    ).scalar() or 0.0
+    # Current month income and expenses from the monthly rollups
+    totals = get_month_totals(db, user_id, now.year, now.month)
+    monthly_income = totals["income"]
+    monthly_expenses = totals["expense"]
 
     # Calculate savings rate
     savings_rate = 0.0
@@ -52,11 +36,15 @@ def get_dashboard_stats(db: Session, user_id: str) -> DashboardStats:
     )
 
 
-def get_recent_transactions(db: Session, user_id: str, limit: int = 10) -> List[RecentTransactionSummary]:
-    """Get recent transactions for dashboard."""
+def get_recent_transactions(db: Session, user_id: str, limit: int = 10) -> List[dict]:
+    """Get recent transactions for dashboard, as RecentTransactionSummary-shaped dicts."""
     results = db.query(
-        Transaction,
-        Category.name.label("category_name")
+        Transaction.id,
+        Transaction.description,
+        Transaction.amount,
+        Transaction.type,
+        Category.name.label("category_name"),
+        Transaction.transaction_date
     ).outerjoin(
         Category, Transaction.category_id == Category.id
     ).filter(
@@ -65,24 +53,46 @@ def get_recent_transactions(db: Session, user_id: str, limit: int = 10) -> List[
         Transaction.transaction_date.desc()
     ).limit(limit).all()
 
-    transactions = []
-    for trans, cat_name in results:
-        transactions.append(RecentTransactionSummary(
-            id=trans.id,
-            description=trans.description,
-            amount=trans.amount if trans.type == "income" else -trans.amount,
-            type=trans.type,
-            category_name=cat_name or "Uncategorized",
-            category_color="gray",
-            category_icon="FiDollarSign",
-            transaction_date=trans.transaction_date.strftime("%Y-%m-%d")
-        ))
+    return [
+        {
+            "id": row.id,
+            "description": row.description,
+            "amount": row.amount if row.type == "income" else -row.amount,
+            "type": row.type,
+            "category_name": row.category_name or "Uncategorized",
+            "category_color": "gray",
+            "category_icon": "FiDollarSign",
+            "transaction_date": row.transaction_date.strftime("%Y-%m-%d")
+        }
+        for row in results
+    ]
+
+
+def get_dashboard_data(db: Session, user_id: str, version: Optional[int] = None) -> DashboardResponse:
+    """
+    Get complete dashboard data, served from the per-user cache when fresh.
+
+    With the user's dashboard data version, an entry cached before a write
+    from another worker is treated as stale. Entries also record the month
+    they cover, so a month rollover without writes rebuilds the dashboard.
+    """
+    # Taken before building, so a build that straddles the rollover is rebuilt next time
+    month = f"{datetime.now():%Y%m}"
+    cached = dashboard_cache.get(user_id)
+    if cached is not None and cached[1] == month and (version is None or cached[0] == version):
+        return cached[2]
 
-    return transactions
+    token = dashboard_cache.reserve(user_id)
+    try:
+        dashboard = build_dashboard_data(db, user_id)
+        dashboard_cache.put(user_id, (version, month, dashboard), token)
+        return dashboard
+    finally:
+        dashboard_cache.release(user_id, token)
 
 
-def get_dashboard_data(db: Session, user_id: str) -> DashboardResponse:
-    """Get complete dashboard data."""
+def build_dashboard_data(db: Session, user_id: str) -> DashboardResponse:
+    """Compute complete dashboard data from the database."""
     stats = get_dashboard_stats(db, user_id)
     recent_transactions = get_recent_transactions(db, user_id)
     budgets = get_budgets(db, user_id)
@@ -90,13 +100,13 @@ def get_dashboard_data(db: Session, user_id: str) -> DashboardResponse:
     # Convert budgets to dict format
     budget_dicts = [
         {
-            "id": b.id,
-            "category_name": b.category_name,
-            "amount": b.amount,
-            "spent": b.spent,
-            "remaining": b.remaining,
-            "percentage": b.percentage,
-            "is_over_budget": b.is_over_budget
+            "id": b["id"],
+            "category_name": b["category_name"],
+            "amount": b["amount"],
+            "spent": b["spent"],
+            "remaining": b["remaining"],
+            "percentage": b["percentage"],
+            "is_over_budget": b["is_over_budget"]
         }
         for b in budgets
     ]
@@ -0,0 +1,51 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.data_version import UserDataVersion
+
+# The read endpoints each kind of write can change
+AFFECTED_RESOURCES = {
+    "account": ("accounts", "dashboard"),
+    "category": ("categories", "budgets", "dashboard"),
+    "budget": ("budgets", "dashboard"),
+    # Balances, budget spending and the dashboard all follow transactions
+    "transaction": ("accounts", "budgets", "dashboard"),
+}
+
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def bump_data_version(db: Session, user_id: str, change: str):
+    """
+    Advance the versions of everything a change of kind `change` affects.
+
+    Call before the writer's commit, so the bump and the data change
+    become visible together.
+    """
+    resources = AFFECTED_RESOURCES[change]
+    increments = {resource: getattr(UserDataVersion, resource) + 1 for resource in resources}
+
+    upsert_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if upsert_insert is not None:
+        statement = upsert_insert(UserDataVersion).values(
+            user_id=user_id, **{resource: 1 for resource in resources}
+        )
+        db.execute(statement.on_conflict_do_update(index_elements=["user_id"], set_=increments))
+        return
+
+    result = db.execute(
+        update(UserDataVersion).where(UserDataVersion.user_id == user_id).values(**increments)
+    )
+    if result.rowcount == 0:
+        db.execute(insert(UserDataVersion).values(user_id=user_id, **{resource: 1 for resource in resources}))
+
+
+def get_data_version(db: Session, user_id: str, resource: str) -> int:
+    """Current version of one of a user's read endpoints (0 before any write)."""
+    version = db.query(getattr(UserDataVersion, resource)).filter(
+        UserDataVersion.user_id == user_id
+    ).scalar()
+    return version or 0
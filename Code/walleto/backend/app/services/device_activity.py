@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import bindparam, update
+from app.core.database import SessionLocal
+from app.core.config import settings
+from app.models.trusted_device import TrustedDevice
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LastUsedBuffer:
+    """
+    Coalesce trusted-device last_used writes in memory.
+
+    A trusted sign-in only records the time against the device id; one
+    thread writes every pending timestamp in a single bulk UPDATE at least
+    every max_staleness seconds, or as soon as flush_size devices are
+    pending. A device used many times between flushes costs one row write.
+    """
+
+    def __init__(self, max_staleness: float, flush_size: int):
+        self.max_staleness = max_staleness
+        self.flush_size = flush_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self.touched = 0
+        self.written = 0
+
+    def start(self):
+        """Start the flush thread (idempotent)."""
+        with self._lock:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="device-last-used", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Write whatever is pending and stop the flush thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+        if thread is not None:
+            self._wake.set()
+            thread.join(timeout)
+
+    def touch(self, device_id: str, used_at: Optional[datetime] = None):
+        """Record that a device was used; written by the next flush."""
+        self.start()
+        with self._lock:
+            self._pending[device_id] = used_at or datetime.now()
+            self.touched += 1
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self._wake.set()
+
+    def pending(self, device_id: str) -> Optional[datetime]:
+        """The buffered last_used for a device, if it has not been written yet."""
+        with self._lock:
+            return self._pending.get(device_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": len(self._pending), "touched": self.touched, "written": self.written}
+
+    def flush(self):
+        """Write every pending timestamp in one bulk UPDATE."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return
+
+        db = SessionLocal()
+        try:
+            # Core executemany: devices deleted meanwhile just match no row
+            db.execute(
+                update(TrustedDevice.__table__)
+                .where(TrustedDevice.id == bindparam("device_id"))
+                .values(last_used=bindparam("used_at")),
+                [{"device_id": device_id, "used_at": used_at} for device_id, used_at in batch.items()]
+            )
+            db.commit()
+            with self._lock:
+                self.written += len(batch)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to write last_used for {len(batch)} trusted devices: {str(e)}")
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.max_staleness)
+            self._wake.clear()
+            self.flush()
+            with self._lock:
+                if self._stopping:
+                    return
+
+
+device_last_used = LastUsedBuffer(
+    max_staleness=settings.DEVICE_LAST_USED_MAX_STALENESS_SECONDS,
+    flush_size=settings.DEVICE_LAST_USED_FLUSH_SIZE
+)
@@ -1,9 +1,14 @@
 from sqlalchemy.orm import Session
 from fastapi import Request
 from datetime import datetime, timedelta
+from typing import List, Optional
 import secrets
 import hashlib
+import time
+from app.core.config import settings
+from app.core.database import delete_in_batches
 from app.models.trusted_device import TrustedDevice
+from app.services.device_activity import device_last_used
 
 
 def generate_device_token() -> str:
@@ -66,22 +71,50 @@ def verify_trusted_device(
     Returns:
         bool: True if device is trusted and valid, False otherwise
     """
-    device = db.query(TrustedDevice).filter(
+    device_id = db.query(TrustedDevice.id).filter(
         TrustedDevice.user_id == user_id,
         TrustedDevice.device_token == device_token,
         TrustedDevice.is_active == True,
         TrustedDevice.expires_at > datetime.now()
-    ).first()
+    ).scalar()
 
-    if device:
-        # Update last_used timestamp
-        device.last_used = datetime.now()
-        db.commit()
+    if device_id:
+        # Update last_used timestamp (written in bulk by device_last_used)
+        device_last_used.touch(device_id)
         return True
 
     return False
 
 
+def list_trusted_devices(db: Session, user_id: str) -> List[TrustedDevice]:
+    """
+    Get a user's active, unexpired trusted devices, most recently used first.
+
+    last_used includes sign-ins still buffered in device_last_used.
+
+    Args:
+        db: Database session
+        user_id: User's ID
+
+    Returns:
+        List[TrustedDevice]: The user's trusted devices
+    """
+    devices = db.query(TrustedDevice).filter(
+        TrustedDevice.user_id == user_id,
+        TrustedDevice.is_active == True,
+        TrustedDevice.expires_at > datetime.now()
+    ).all()
+
+    for device in devices:
+        pending = device_last_used.pending(device.id)
+        if pending:
+            # Detached, so the merged value is never written back
+            db.expunge(device)
+            device.last_used = pending
+
+    return sorted(devices, key=lambda device: device.last_used or device.created_at, reverse=True)
+
+
 def revoke_trusted_device(db: Session, user_id: str, device_token: str) -> bool:
     """
     Revoke a trusted device.
@@ -107,19 +140,22 @@ def revoke_trusted_device(db: Session, user_id: str, device_token: str) -> bool:
     return False
 
 
-def cleanup_expired_devices(db: Session) -> int:
+def cleanup_expired_devices(db: Session, deadline: Optional[float] = None) -> int:
     """
-    Remove expired trusted devices from database.
+    Remove expired trusted devices from database, in batches.
 
     Args:
         db: Database session
+        deadline: time.monotonic() value to stop at; defaults to
+            CLEANUP_TIME_BUDGET_SECONDS from now
 
     Returns:
         int: Number of devices deleted
     """
-    deleted = db.query(TrustedDevice).filter(
-        TrustedDevice.expires_at < datetime.now()
-    ).delete()
+    if deadline is None:
+        deadline = time.monotonic() + settings.CLEANUP_TIME_BUDGET_SECONDS
 
-    db.commit()
-    return deleted
+    return delete_in_batches(
+        db, TrustedDevice, TrustedDevice.expires_at < datetime.now(),
+        batch_size=settings.CLEANUP_BATCH_SIZE, deadline=deadline
+    )
@@ -1,129 +1,295 @@
 import smtplib
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from dataclasses import dataclass
+from typing import Optional
 from app.core.config import settings
 import logging
+import queue
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 
-async def send_otp_email(email: str, otp_code: str, purpose: str):
+@dataclass
+class _Delivery:
+    message: Message
+    attempt: int = 0
+
+
+class SMTPDeliveryQueue:
     """
-    Send OTP verification email to user using simple SMTP.
+    Background SMTP delivery with a small pool of worker threads.
 
-    Args:
-        email: Recipient email address
-        otp_code: 6-digit OTP code
-        purpose: 'signup' or 'signin'
+    Each worker keeps one authenticated connection open and reuses it for
+    every message it sends, reconnecting when the server drops it or it has
+    been idle for SMTP_IDLE_TIMEOUT_SECONDS. Transient failures are retried
+    with exponential backoff; permanent (5xx) rejections are logged and
+    dropped. Callers only pay for putting the message on the queue.
     """
-    try:
-        purpose_text = "Sign Up" if purpose == "signup" else "Sign In"
-
-        # Create email message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f"Your Walleto Verification Code - {otp_code}"
-        msg['From'] = settings.SMTP_FROM
-        msg['To'] = email
-
-        # HTML email body
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 600px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 30px;
-                    text-align: center;
-                    border-radius: 10px 10px 0 0;
-                }}
-                .content {{
-                    background: #f9f9f9;
-                    padding: 40px 30px;
-                    border-radius: 0 0 10px 10px;
-                }}
-                .otp-code {{
-                    background: white;
-                    border: 2px dashed #667eea;
-                    padding: 20px;
-                    text-align: center;
-                    margin: 30px 0;
-                    border-radius: 8px;
-                }}
-                .otp-digits {{
-                    font-size: 48px;
-                    font-weight: bold;
-                    color: #667eea;
-                    letter-spacing: 8px;
-                    font-family: 'Courier New', monospace;
-                }}
-                .warning {{
-                    background: #fff3cd;
-                    border-left: 4px solid #ffc107;
-                    padding: 15px;
-                    margin-top: 20px;
-                    border-radius: 4px;
-                }}
-                .footer {{
-                    text-align: center;
-                    color: #666;
-                    font-size: 12px;
-                    margin-top: 30px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>Walleto</h1>
-                <p>Your Verification Code</p>
-            </div>
-            <div class="content">
-                <h2>Hello!</h2>
-                <p>You requested to {purpose_text.lower()} to your Walleto account.</p>
-                <p>Please use the following verification code to complete your {purpose_text.lower()}:</p>
-
-                <div class="otp-code">
-                    <div class="otp-digits">{otp_code}</div>
-                    <p style="margin: 10px 0 0 0; color: #666; font-size: 14px;">Valid for 6 minutes</p>
-                </div>
-
-                <p>Enter this code on the verification page to proceed.</p>
-
-                <div class="warning">
-                    <strong>⚠️ Security Notice:</strong><br>
-                    If you didn't request this code, please ignore this email and ensure your account is secure.
-                    Never share this code with anyone.
-                </div>
-            </div>
-            <div class="footer">
-                <p>This is an automated email from Walleto. Please do not reply.</p>
-                <p>&copy; 2024 Walleto. All rights reserved.</p>
-            </div>
-        </body>
-        </html>
-        """
 
-        # Attach HTML content
-        html_part = MIMEText(html, 'html')
-        msg.attach(html_part)
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        max_retries: int,
+        backoff_seconds: float,
+        idle_timeout_seconds: float
+    ):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.connections = 0
+
+    def start(self):
+        """Start the worker threads (idempotent)."""
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"smtp-worker-{n}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Let queued messages drain for up to timeout seconds, then stop the workers."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        deadline = time.monotonic() + timeout
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
 
-        # Send email via SMTP
-        with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
+    def enqueue(self, message: Message):
+        """Queue a message for delivery; raises queue.Full when the backlog is at its limit."""
+        self.start()
+        self._queue.put_nowait(_Delivery(message))
+
+    def stats(self) -> dict:
+        """Delivery counters for /metrics."""
+        with self._lock:
+            return {
+                "workers": len(self._threads),
+                "queued": self._queue.qsize(),
+                "sent": self.sent,
+                "failed": self.failed,
+                "retries": self.retries,
+                "connections": self.connections,
+            }
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        if settings.SMTP_USE_TLS:
             server.starttls()  # Secure connection
+        if settings.SMTP_USERNAME:
             server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-            server.send_message(msg)
+        self._count("connections")
+        return server
+
+    @staticmethod
+    def _close(server: Optional[smtplib.SMTP]):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _run(self):
+        server = None
+        last_used = 0.0
+        while True:
+            try:
+                delivery = self._queue.get(timeout=self.idle_timeout_seconds)
+            except queue.Empty:
+                # Idle: don't hold a connection the server will drop anyway
+                self._close(server)
+                server = None
+                continue
+
+            if delivery is None:
+                self._close(server)
+                return
+
+            if server is not None and time.monotonic() - last_used > self.idle_timeout_seconds:
+                self._close(server)
+                server = None
+
+            try:
+                if server is None:
+                    server = self._connect()
+                server.send_message(delivery.message)
+                last_used = time.monotonic()
+                self._count("sent")
+                logger.info(f"Email sent to {delivery.message['To']}")
+            except Exception as e:
+                self._close(server)
+                server = None
+                self._retry(delivery, e)
+
+    def _retry(self, delivery: _Delivery, error: Exception):
+        recipient = delivery.message["To"]
+        permanent = isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+        if permanent or isinstance(error, smtplib.SMTPRecipientsRefused) or delivery.attempt >= self.max_retries:
+            self._count("failed")
+            logger.error(f"Failed to send email to {recipient} after {delivery.attempt + 1} attempts: {str(error)}")
+            return
+
+        delay = self.backoff_seconds * (2 ** delivery.attempt)
+        delivery.attempt += 1
+        self._count("retries")
+        logger.warning(f"Email to {recipient} failed ({str(error)}); retrying in {delay:.1f}s")
+
+        timer = threading.Timer(delay, self._requeue, args=(delivery,))
+        timer.daemon = True
+        timer.start()
 
-        logger.info(f"OTP email sent successfully to {email} for {purpose}")
+    def _requeue(self, delivery: _Delivery):
+        try:
+            self._queue.put_nowait(delivery)
+        except queue.Full:
+            self._count("failed")
+            logger.error(f"Dropped email to {delivery.message['To']}: delivery queue full")
 
-    except Exception as e:
-        logger.error(f"Failed to send OTP email to {email}: {str(e)}")
-        raise Exception(f"Failed to send verification email. Please check your email address or try again later.")
+
+email_queue = SMTPDeliveryQueue(
+    workers=settings.SMTP_WORKERS,
+    max_queue=settings.SMTP_QUEUE_MAX,
+    max_retries=settings.SMTP_MAX_RETRIES,
+    backoff_seconds=settings.SMTP_RETRY_BACKOFF_SECONDS,
+    idle_timeout_seconds=settings.SMTP_IDLE_TIMEOUT_SECONDS
+)
+
+
+def build_otp_message(email: str, otp_code: str, purpose: str) -> Message:
+    """Build the OTP verification email."""
+    purpose_text = "Sign Up" if purpose == "signup" else "Sign In"
+
+    # Create email message
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = f"Your Walleto Verification Code - {otp_code}"
+    msg['From'] = settings.SMTP_FROM
+    msg['To'] = email
+
+    # HTML email body
+    html = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+                line-height: 1.6;
+                color: #333;
+                max-width: 600px;
+                margin: 0 auto;
+                padding: 20px;
+            }}
+            .header {{
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 30px;
+                text-align: center;
+                border-radius: 10px 10px 0 0;
+            }}
+            .content {{
+                background: #f9f9f9;
+                padding: 40px 30px;
+                border-radius: 0 0 10px 10px;
+            }}
+            .otp-code {{
+                background: white;
+                border: 2px dashed #667eea;
+                padding: 20px;
+                text-align: center;
+                margin: 30px 0;
+                border-radius: 8px;
+            }}
+            .otp-digits {{
+                font-size: 48px;
+                font-weight: bold;
+                color: #667eea;
+                letter-spacing: 8px;
+                font-family: 'Courier New', monospace;
+            }}
+            .warning {{
+                background: #fff3cd;
+                border-left: 4px solid #ffc107;
+                padding: 15px;
+                margin-top: 20px;
+                border-radius: 4px;
+            }}
+            .footer {{
+                text-align: center;
+                color: #666;
+                font-size: 12px;
+                margin-top: 30px;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>Walleto</h1>
+            <p>Your Verification Code</p>
+        </div>
+        <div class="content">
+            <h2>Hello!</h2>
+            <p>You requested to {purpose_text.lower()} to your Walleto account.</p>
+            <p>Please use the following verification code to complete your {purpose_text.lower()}:</p>
+
+            <div class="otp-code">
+                <div class="otp-digits">{otp_code}</div>
+                <p style="margin: 10px 0 0 0; color: #666; font-size: 14px;">Valid for 6 minutes</p>
+            </div>
+
+            <p>Enter this code on the verification page to proceed.</p>
+
+            <div class="warning">
+                <strong>⚠️ Security Notice:</strong><br>
+                If you didn't request this code, please ignore this email and ensure your account is secure.
+                Never share this code with anyone.
+            </div>
+        </div>
+        <div class="footer">
+            <p>This is an automated email from Walleto. Please do not reply.</p>
+            <p>&copy; 2024 Walleto. All rights reserved.</p>
+        </div>
+    </body>
+    </html>
+    """
+
+    # Attach HTML content
+    html_part = MIMEText(html, 'html')
+    msg.attach(html_part)
+    return msg
+
+
+def send_otp_email(email: str, otp_code: str, purpose: str):
+    """
+    Queue an OTP verification email; delivery happens on the SMTP workers.
+
+    Args:
+        email: Recipient email address
+        otp_code: 6-digit OTP code
+        purpose: 'signup' or 'signin'
+    """
+    try:
+        email_queue.enqueue(build_otp_message(email, otp_code, purpose))
+        logger.info(f"OTP email queued for {email} ({purpose})")
+    except queue.Full:
+        logger.error(f"Failed to queue OTP email to {email}: delivery queue full")
+        raise Exception("Failed to send verification email. Please try again later.")
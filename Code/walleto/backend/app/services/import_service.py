@@ -0,0 +1,335 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from fastapi import HTTPException, status
+from app.models.transaction import Transaction
+from app.models.account import Account
+from app.services.account_service import adjust_balance
+from app.services.balance_history_service import discard_checkpoints
+from app.services.rollup_service import apply_rollup_delta
+from app.core.cache import dashboard_cache
+from app.services.data_version_service import bump_data_version
+from typing import Iterable, Iterator, List, NamedTuple, Optional, TextIO
+from datetime import datetime
+import csv
+import hashlib
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows are inserted and checked for duplicates this many at a time
+IMPORT_BATCH_SIZE = 1000
+
+SUPPORTED_FORMATS = ("csv", "ofx", "qif")
+
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d.%m.%Y", "%Y/%m/%d")
+
+OFX_TAG = re.compile(r"<(/?\w+)>([^<\r\n]*)")
+
+
+class StatementRow(NamedTuple):
+    """A single parsed statement line; amount is signed (negative = expense)."""
+    transaction_date: datetime
+    amount: float
+    description: str
+    notes: Optional[str] = None
+
+
+def detect_format(filename: Optional[str], format: Optional[str] = None) -> str:
+    """Resolve the statement format from an explicit value or the file extension."""
+    if not format and filename and "." in filename:
+        format = filename.rsplit(".", 1)[1]
+
+    format = (format or "").lower()
+    if format not in SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported statement format. Use one of: {', '.join(SUPPORTED_FORMATS)}"
+        )
+
+    return format
+
+
+def parse_date(value: str) -> datetime:
+    """Parse the date formats commonly found in bank statements."""
+    value = value.strip().replace("'", "/")
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value}")
+
+
+def parse_amount(value: str) -> float:
+    """Parse an amount such as '1,234.56', '(12.00)' or '$-3.50'."""
+    value = value.strip().replace(",", "").replace("$", "")
+    if value.startswith("(") and value.endswith(")"):
+        value = "-" + value[1:-1]
+    return float(value)
+
+
+def _malformed_csv(reader: csv.DictReader, error: csv.Error) -> ValueError:
+    return ValueError(f"malformed CSV at line {reader.line_num}: {error}")
+
+
+def _csv_records(reader: csv.DictReader) -> Iterator[dict]:
+    """Iterate a reader, reporting bad quoting, NUL bytes or huge fields as ValueError."""
+    try:
+        yield from reader
+    except csv.Error as e:
+        raise _malformed_csv(reader, e)
+
+
+def parse_csv(stream: TextIO) -> Iterator[StatementRow]:
+    """
+    Parse a CSV statement with a header row.
+
+    Recognizes a date column, a description/payee/memo column and either a
+    signed amount column or separate debit/credit columns.
+    """
+    # strict: an unterminated quote is an error, not the rest of the file in one field
+    reader = csv.DictReader(stream, strict=True)
+    try:
+        fieldnames = reader.fieldnames
+    except csv.Error as e:
+        raise _malformed_csv(reader, e)
+    if not fieldnames:
+        return
+
+    columns = {name.strip().lower(): name for name in fieldnames if name}
+
+    def column(*candidates: str) -> Optional[str]:
+        for candidate in candidates:
+            if candidate in columns:
+                return columns[candidate]
+        return None
+
+    date_col = column("date", "transaction date", "posted date", "posting date")
+    desc_col = column("description", "payee", "name", "memo", "details")
+    notes_col = column("notes", "memo")
+    if notes_col == desc_col:
+        notes_col = None
+    amount_col = column("amount", "transaction amount")
+    debit_col = column("debit", "withdrawal")
+    credit_col = column("credit", "deposit")
+
+    if not date_col or not desc_col or not (amount_col or debit_col or credit_col):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV must have date, description and amount (or debit/credit) columns"
+        )
+
+    for record in _csv_records(reader):
+        notes = record.get(notes_col) if notes_col else None
+
+        if amount_col and record.get(amount_col):
+            amount = parse_amount(record[amount_col])
+        else:
+            debit = record.get(debit_col) if debit_col else None
+            credit = record.get(credit_col) if credit_col else None
+            amount = (parse_amount(credit) if credit else 0.0) - (abs(parse_amount(debit)) if debit else 0.0)
+
+        yield StatementRow(
+            transaction_date=parse_date(record[date_col]),
+            amount=amount,
+            description=(record.get(desc_col) or "").strip(),
+            notes=notes.strip() if notes and notes.strip() else None
+        )
+
+
+def parse_ofx(stream: TextIO) -> Iterator[StatementRow]:
+    """Parse <STMTTRN> blocks from an OFX (SGML or XML) statement."""
+    current = None
+    for line in stream:
+        for tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                current = {}
+            elif tag == "/STMTTRN" and current is not None:
+                yield StatementRow(
+                    transaction_date=datetime.strptime(current["DTPOSTED"][:8], "%Y%m%d"),
+                    amount=parse_amount(current["TRNAMT"]),
+                    description=current.get("NAME") or current.get("MEMO") or "",
+                    notes=current.get("MEMO") if current.get("NAME") else None
+                )
+                current = None
+            elif current is not None and not tag.startswith("/"):
+                current[tag] = value.strip()
+
+
+def parse_qif(stream: TextIO) -> Iterator[StatementRow]:
+    """Parse a QIF statement, one record per '^' terminator."""
+    current = {}
+    for line in stream:
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+
+        code, value = line[0], line[1:].strip()
+        if code == "^":
+            if "D" in current and "T" in current:
+                yield StatementRow(
+                    transaction_date=parse_date(current["D"]),
+                    amount=parse_amount(current["T"]),
+                    description=(current.get("P") or current.get("M") or "").strip(),
+                    notes=current.get("M") if current.get("P") else None
+                )
+            current = {}
+        elif code == "U":
+            current.setdefault("T", value)
+        else:
+            current[code] = value
+
+
+PARSERS = {
+    "csv": parse_csv,
+    "ofx": parse_ofx,
+    "qif": parse_qif,
+}
+
+
+def normalize_description(description: str) -> str:
+    """Lower-case and collapse whitespace so cosmetic differences don't defeat dedupe."""
+    return " ".join(description.lower().split())
+
+
+def compute_import_hash(account_id: str, row: StatementRow, occurrence: int = 1) -> str:
+    """
+    Content hash of (account, date, amount, normalized description).
+
+    occurrence is the nth time the same content appears in one statement,
+    so two identical real transactions (two coffees on one day) get distinct
+    hashes that still match when the statement is imported again. The first
+    occurrence hashes the content alone.
+    """
+    parts = [
+        account_id,
+        row.transaction_date.date().isoformat(),
+        f"{row.amount:.2f}",
+        normalize_description(row.description),
+    ]
+    if occurrence > 1:
+        parts.append(str(occurrence))
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _insert_batch(db: Session, user_id: str, account_id: str, batch: List[tuple]) -> tuple:
+    """Insert one batch, skipping rows whose hash is already stored. Returns (inserted, duplicates, net)."""
+    hashes = {import_hash for import_hash, _ in batch}
+    existing = {
+        import_hash for (import_hash,) in db.query(Transaction.import_hash).filter(
+            Transaction.account_id == account_id,
+            Transaction.import_hash.in_(hashes)
+        )
+    }
+
+    rows = []
+    net = 0.0
+    for import_hash, row in batch:
+        if import_hash in existing:
+            continue
+
+        rows.append({
+            "user_id": user_id,
+            "account_id": account_id,
+            "type": "income" if row.amount > 0 else "expense",
+            "amount": abs(row.amount),
+            "description": (row.description or "Imported transaction")[:200],
+            "notes": row.notes,
+            "transaction_date": row.transaction_date,
+            "import_hash": import_hash,
+        })
+        net += row.amount
+
+    if rows:
+        db.execute(insert(Transaction), rows)
+
+        # One rollup delta per (type, month) in the batch instead of one per row
+        rollups = {}
+        for row in rows:
+            key = (row["type"], row["transaction_date"].year, row["transaction_date"].month)
+            total, count = rollups.get(key, (0.0, 0))
+            rollups[key] = (total + row["amount"], count + 1)
+        for (type, year, month), (total, count) in rollups.items():
+            apply_rollup_delta(db, user_id, None, type, year, month, total, count)
+
+    return len(rows), len(batch) - len(rows), net
+
+
+def import_statement(
+    db: Session,
+    user_id: str,
+    account_id: str,
+    rows: Iterable[StatementRow],
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> dict:
+    """
+    Bulk-import parsed statement rows into an account.
+
+    Rows are consumed lazily and inserted batch_size at a time, so memory
+    stays flat apart from one counter per distinct row content. Rows whose
+    content hash is already stored for the account are skipped; repeats
+    within the statement are kept (see compute_import_hash). The account
+    balance receives a single net delta and the whole import commits once.
+    """
+    account = db.query(Account).filter(
+        Account.id == account_id,
+        Account.user_id == user_id
+    ).first()
+
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found"
+        )
+
+    imported = duplicates = line_number = 0
+    net = 0.0
+    earliest = None
+    batch = []
+    occurrences = {}
+
+    try:
+        for line_number, row in enumerate(rows, start=1):
+            if row.amount == 0:
+                continue
+            content = compute_import_hash(account_id, row)
+            occurrences[content] = occurrences.get(content, 0) + 1
+            batch.append((compute_import_hash(account_id, row, occurrences[content]), row))
+            if earliest is None or row.transaction_date < earliest:
+                earliest = row.transaction_date
+
+            if len(batch) >= batch_size:
+                inserted, skipped, delta = _insert_batch(db, user_id, account_id, batch)
+                imported, duplicates, net = imported + inserted, duplicates + skipped, net + delta
+                batch = []
+
+        if batch:
+            inserted, skipped, delta = _insert_batch(db, user_id, account_id, batch)
+            imported, duplicates, net = imported + inserted, duplicates + skipped, net + delta
+    except (ValueError, KeyError, AttributeError, csv.Error) as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not parse statement near row {line_number + 1}: {str(e)}"
+        )
+
+    adjust_balance(db, account_id, net)
+
+    # Checkpoints from the oldest imported day onward no longer hold; history falls back to older ones
+    if earliest:
+        discard_checkpoints(db, account_id, earliest.date())
+
+    bump_data_version(db, user_id, "transaction")
+    db.commit()
+    dashboard_cache.invalidate(user_id)
+    db.refresh(account)
+
+    logger.info(f"Statement import for account {account_id}: {imported} imported, {duplicates} duplicates")
+
+    return {
+        "imported": imported,
+        "duplicates": duplicates,
+        "balance": account.balance
+    }
@@ -1,10 +1,17 @@
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status, Request
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Optional
 import secrets
 import logging
+import time
 from app.models.otp import OTP, OTPAttempt
+from app.core.config import settings
+from app.core.database import delete_in_batches
+from app.core.rate_limit import RateLimit, enforce_rate_limit
 from app.services.email import send_otp_email
+from app.services.audit_log import otp_attempt_log
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +21,15 @@ def generate_otp_code() -> str:
     return ''.join([str(secrets.randbelow(10)) for _ in range(6)])
 
 
-def check_rate_limit(db: Session, email: str, attempt_type: str, request: Request):
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def check_rate_limit(email: str, attempt_type: str, request: Request):
     """
-    Check if user has exceeded rate limits.
+    Check and count an OTP attempt against the per-email and per-IP limits.
 
     Args:
-        db: Database session
         email: User's email
         attempt_type: 'generate' or 'verify'
         request: FastAPI request object
@@ -27,27 +37,34 @@ def check_rate_limit(db: Session, email: str, attempt_type: str, request: Reques
     Raises:
         HTTPException: If rate limit exceeded
     """
-    cutoff = datetime.now() - timedelta(minutes=10)
-
-    attempts = db.query(OTPAttempt).filter(
-        OTPAttempt.email == email,
-        OTPAttempt.attempt_type == attempt_type,
-        OTPAttempt.created_at > cutoff
-    ).count()
-
-    # Max 3 OTP generation requests per 10 minutes
-    if attempt_type == "generate" and attempts >= 3:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Too many OTP requests. Please wait 10 minutes before trying again."
-        )
-
-    # Max 5 verification attempts per 10 minutes
-    if attempt_type == "verify" and attempts >= 5:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Too many verification attempts. Please wait 10 minutes before trying again."
-        )
+    window = settings.RATE_LIMIT_WINDOW_SECONDS
+    ip = _client_ip(request)
+
+    # Max 3 OTP generation requests per 10 minutes (defaults)
+    if attempt_type == "generate":
+        enforce_rate_limit([
+            RateLimit(f"otp:generate:email:{email.lower()}", settings.OTP_GENERATE_PER_EMAIL, window),
+            RateLimit(f"otp:generate:ip:{ip}", settings.OTP_GENERATE_PER_IP, window),
+        ], "Too many OTP requests. Please wait 10 minutes before trying again.")
+
+    # Max 5 verification attempts per 10 minutes (defaults)
+    if attempt_type == "verify":
+        enforce_rate_limit([
+            RateLimit(f"otp:verify:email:{email.lower()}", settings.OTP_VERIFY_PER_EMAIL, window),
+            RateLimit(f"otp:verify:ip:{ip}", settings.OTP_VERIFY_PER_IP, window),
+        ], "Too many verification attempts. Please wait 10 minutes before trying again.")
+
+
+def record_attempt(email: str, attempt_type: str, success: bool, request: Request):
+    """Queue an OTPAttempt audit row; it is written in the background."""
+    otp_attempt_log.add(
+        email=email,
+        attempt_type=attempt_type,
+        success=success,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+        created_at=datetime.now()
+    )
 
 
 async def create_otp(db: Session, email: str, purpose: str, request: Request) -> dict:
@@ -67,7 +84,7 @@ async def create_otp(db: Session, email: str, purpose: str, request: Request) ->
         HTTPException: If rate limit exceeded or email sending fails
     """
     # Check rate limit
-    check_rate_limit(db, email, "generate", request)
+    check_rate_limit(email, "generate", request)
 
     # Delete any existing unverified OTPs for this email and purpose
     db.query(OTP).filter(
@@ -89,22 +106,15 @@ async def create_otp(db: Session, email: str, purpose: str, request: Request) ->
     )
 
     db.add(otp)
+    db.commit()
 
     # Log attempt
-    db.add(OTPAttempt(
-        email=email,
-        attempt_type="generate",
-        success=True,
-        ip_address=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent")
-    ))
-
-    db.commit()
+    record_attempt(email, "generate", True, request)
 
-    # Send email
+    # Queue email; SMTP delivery happens in the background
     try:
-        await send_otp_email(email, otp_code, purpose)
-        logger.info(f"OTP generated and sent to {email} for {purpose}")
+        send_otp_email(email, otp_code, purpose)
+        logger.info(f"OTP generated and queued for {email} for {purpose}")
     except Exception as e:
         logger.error(f"Failed to send OTP email: {str(e)}")
         raise HTTPException(
@@ -133,7 +143,7 @@ def verify_otp(db: Session, email: str, otp_code: str, purpose: str, request: Re
         HTTPException: If rate limit exceeded or OTP invalid/expired
     """
     # Check rate limit
-    check_rate_limit(db, email, "verify", request)
+    check_rate_limit(email, "verify", request)
 
     # Get valid OTP
     otp = db.query(OTP).filter(
@@ -147,13 +157,7 @@ def verify_otp(db: Session, email: str, otp_code: str, purpose: str, request: Re
     success = otp is not None
 
     # Log attempt
-    db.add(OTPAttempt(
-        email=email,
-        attempt_type="verify",
-        success=success,
-        ip_address=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent")
-    ))
+    record_attempt(email, "verify", success, request)
 
     if success:
         # Mark as verified (prevents reuse)
@@ -162,7 +166,6 @@ def verify_otp(db: Session, email: str, otp_code: str, purpose: str, request: Re
         logger.info(f"OTP verified successfully for {email} ({purpose})")
         return True
     else:
-        db.commit()
         logger.warning(f"Invalid OTP attempt for {email} ({purpose})")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -170,28 +173,85 @@ def verify_otp(db: Session, email: str, otp_code: str, purpose: str, request: Re
         )
 
 
-def cleanup_expired_otps(db: Session) -> tuple:
+def _partition_day(name: str) -> Optional[date]:
+    try:
+        return datetime.strptime(name, "otp_attempts_p%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def maintain_otp_attempt_partitions(db: Session, days_ahead: int = 2) -> int:
     """
-    Cleanup expired OTPs and old attempts.
+    Create the next daily otp_attempts partitions and drop expired ones.
+
+    Only acts when OTP_ATTEMPTS_PARTITIONED is set on PostgreSQL. Rows
+    outside every daily range land in otp_attempts_default and are removed
+    by the batched delete in cleanup_expired_otps.
+
+    Returns:
+        int: Number of partitions dropped
+    """
+    if not settings.OTP_ATTEMPTS_PARTITIONED or db.get_bind().dialect.name != "postgresql":
+        return 0
+
+    today = date.today()
+    db.execute(text("CREATE TABLE IF NOT EXISTS otp_attempts_default PARTITION OF otp_attempts DEFAULT"))
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS otp_attempts_p{day:%Y%m%d} PARTITION OF otp_attempts "
+            f"FOR VALUES FROM ('{day}') TO ('{day + timedelta(days=1)}')"
+        ))
+
+    # A day's partition goes once all of it is older than the retention cutoff
+    cutoff = today - timedelta(days=settings.OTP_ATTEMPT_RETENTION_DAYS)
+    partitions = db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'otp_attempts'"
+    )).scalars().all()
+    dropped = 0
+    for name in partitions:
+        day = _partition_day(name)
+        if day is not None and day + timedelta(days=1) <= cutoff:
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped += 1
+
+    db.commit()
+    if dropped:
+        logger.info(f"Cleanup: dropped {dropped} otp_attempts partitions")
+    return dropped
+
+
+def cleanup_expired_otps(db: Session, deadline: Optional[float] = None) -> tuple:
+    """
+    Cleanup expired OTPs and old attempts, in batches.
 
     Args:
         db: Database session
+        deadline: time.monotonic() value to stop at; defaults to
+            CLEANUP_TIME_BUDGET_SECONDS from now
 
     Returns:
         tuple: (deleted_otps_count, deleted_attempts_count)
     """
+    if deadline is None:
+        deadline = time.monotonic() + settings.CLEANUP_TIME_BUDGET_SECONDS
+
     # Delete expired OTPs (older than now)
-    deleted_otps = db.query(OTP).filter(
-        OTP.expires_at < datetime.now()
-    ).delete()
+    deleted_otps = delete_in_batches(
+        db, OTP, OTP.expires_at < datetime.now(),
+        batch_size=settings.CLEANUP_BATCH_SIZE, deadline=deadline
+    )
 
     # Delete old attempts (keep 7 days for security audit)
-    cutoff = datetime.now() - timedelta(days=7)
-    deleted_attempts = db.query(OTPAttempt).filter(
-        OTPAttempt.created_at < cutoff
-    ).delete()
-
-    db.commit()
+    maintain_otp_attempt_partitions(db)
+    cutoff = datetime.now() - timedelta(days=settings.OTP_ATTEMPT_RETENTION_DAYS)
+    deleted_attempts = delete_in_batches(
+        db, OTPAttempt, OTPAttempt.created_at < cutoff,
+        batch_size=settings.CLEANUP_BATCH_SIZE, deadline=deadline
+    )
 
     if deleted_otps > 0 or deleted_attempts > 0:
         logger.info(f"Cleanup: {deleted_otps} expired OTPs and {deleted_attempts} old attempts deleted")
@@ -0,0 +1,173 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, update, delete, extract, case, tuple_
+from app.models.rollup import MonthlyRollup
+from app.models.transaction import Transaction
+from app.services.data_version_service import bump_data_version
+from typing import Dict, List, Optional
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def apply_rollup_delta(
+    db: Session,
+    user_id: str,
+    category_id: Optional[str],
+    type: str,
+    year: int,
+    month: int,
+    amount: float,
+    count: int
+):
+    """
+    Add amount/count to the rollup row for a key, creating it if missing.
+
+    Runs in the caller's DB transaction so the rollup commits (or rolls
+    back) together with the transaction change. Readers always SUM rollup
+    rows, so a duplicate row from a concurrent first insert stays correct.
+    """
+    category_filter = (
+        MonthlyRollup.category_id.is_(None) if category_id is None
+        else MonthlyRollup.category_id == category_id
+    )
+
+    result = db.execute(
+        update(MonthlyRollup).where(
+            MonthlyRollup.user_id == user_id,
+            category_filter,
+            MonthlyRollup.type == type,
+            MonthlyRollup.year == year,
+            MonthlyRollup.month == month
+        ).values(
+            total=MonthlyRollup.total + amount,
+            count=MonthlyRollup.count + count
+        )
+    )
+
+    if result.rowcount == 0:
+        db.execute(insert(MonthlyRollup).values(
+            user_id=user_id,
+            category_id=category_id,
+            type=type,
+            year=year,
+            month=month,
+            total=amount,
+            count=count
+        ))
+
+
+def record_transaction(
+    db: Session,
+    user_id: str,
+    category_id: Optional[str],
+    type: str,
+    transaction_date: datetime,
+    amount: float,
+    sign: int = 1
+):
+    """
+    Add (sign=1) or remove (sign=-1) one transaction from its monthly rollup.
+
+    The month is taken from transaction_date as stored (see
+    app.core.periods.to_naive_utc), which is what rebuild_rollups extracts.
+    """
+    apply_rollup_delta(
+        db, user_id, category_id, type,
+        transaction_date.year, transaction_date.month,
+        sign * amount, sign
+    )
+
+
+def get_month_totals(db: Session, user_id: str, year: int, month: int) -> Dict[str, float]:
+    """Get a month's income and expense totals from the rollups."""
+    totals = {"income": 0.0, "expense": 0.0}
+    rows = db.query(MonthlyRollup.type, func.sum(MonthlyRollup.total)).filter(
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.year == year,
+        MonthlyRollup.month == month
+    ).group_by(MonthlyRollup.type).all()
+
+    for type, total in rows:
+        totals[type] = float(total or 0.0)
+    return totals
+
+
+def get_period_totals(db: Session, user_id: str, start: datetime, end: datetime, granularity: str) -> List[tuple]:
+    """
+    Get (year[, month], income, expenses) rows for whole months in [start, end).
+
+    start and end must be month starts; granularity is 'month' or 'year'.
+    """
+    group_columns = [MonthlyRollup.year]
+    if granularity == "month":
+        group_columns.append(MonthlyRollup.month)
+
+    return db.query(
+        *group_columns,
+        func.sum(case((MonthlyRollup.type == "income", MonthlyRollup.total), else_=0.0)),
+        func.sum(case((MonthlyRollup.type == "expense", MonthlyRollup.total), else_=0.0))
+    ).filter(
+        MonthlyRollup.user_id == user_id,
+        tuple_(MonthlyRollup.year, MonthlyRollup.month) >= tuple_(start.year, start.month),
+        tuple_(MonthlyRollup.year, MonthlyRollup.month) < tuple_(end.year, end.month)
+    ).group_by(*group_columns).all()
+
+
+def rebuild_rollups(db: Session, user_id: Optional[str] = None) -> int:
+    """
+    Recompute rollups from raw transactions, for one user or everyone.
+
+    Used to backfill after the table is introduced or to repair drift.
+    Bumps the data version of every affected user; that is what makes
+    running API workers drop their cached dashboards and budgets, since
+    this usually runs in a separate process (app.scripts.rebuild_rollups).
+    Returns the number of rollup rows written.
+    """
+    year = extract('year', Transaction.transaction_date)
+    month = extract('month', Transaction.transaction_date)
+
+    query = db.query(
+        Transaction.user_id,
+        Transaction.category_id,
+        Transaction.type,
+        year,
+        month,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    )
+    clear = delete(MonthlyRollup)
+    if user_id:
+        query = query.filter(Transaction.user_id == user_id)
+        clear = clear.where(MonthlyRollup.user_id == user_id)
+        affected = {user_id}
+    else:
+        # Users whose rollups are about to be replaced, even by nothing
+        affected = {row_user_id for (row_user_id,) in db.query(MonthlyRollup.user_id).distinct()}
+
+    rows = [
+        {
+            "user_id": row_user_id,
+            "category_id": category_id,
+            "type": type,
+            "year": int(row_year),
+            "month": int(row_month),
+            "total": float(total or 0.0),
+            "count": count
+        }
+        for row_user_id, category_id, type, row_year, row_month, total, count in query.group_by(
+            Transaction.user_id, Transaction.category_id, Transaction.type, year, month
+        )
+    ]
+
+    db.execute(clear)
+    if rows:
+        db.execute(insert(MonthlyRollup), rows)
+    # Repaired totals change budget spending and dashboards
+    affected |= {row["user_id"] for row in rows}
+    for affected_user_id in affected:
+        bump_data_version(db, affected_user_id, "transaction")
+    db.commit()
+
+    logger.info(f"Rebuilt {len(rows)} monthly rollup rows" + (f" for user {user_id}" if user_id else ""))
+    return len(rows)
@@ -0,0 +1,51 @@
+from sqlalchemy.orm import Session, Query
+from sqlalchemy import func, or_, select, literal_column, false
+from app.models.transaction import Transaction, transactions_fts, search_vector, SEARCH_CONFIG
+import re
+
+SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts5_query(q: str) -> str:
+    """Turn free text into an FTS5 query of quoted prefix terms, so user input can't break its syntax."""
+    return " ".join(f'"{term}"*' for term in SEARCH_TERM.findall(q))
+
+
+def apply_search(db: Session, query: Query, q: str, ranked: bool = False) -> Query:
+    """
+    Restrict a Transaction query to rows whose description or notes match q.
+
+    Uses the GIN tsvector index on Postgres and the FTS5 table on SQLite.
+    With ranked=True, best matches are ordered first; callers append their
+    own tie-break ordering after this.
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        vector = search_vector(Transaction.description, Transaction.notes)
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), q)
+        query = query.filter(vector.op("@@")(ts_query))
+        if ranked:
+            query = query.order_by(func.ts_rank(vector, ts_query).desc())
+        return query
+
+    if dialect == "sqlite":
+        fts_query = _fts5_query(q)
+        if not fts_query:
+            return query.filter(false())
+
+        matches = select(
+            transactions_fts.c.rowid.label("rowid"),
+            transactions_fts.c.rank.label("rank")
+        ).where(
+            literal_column("transactions_fts").match(fts_query)
+        ).subquery()
+
+        query = query.join(matches, matches.c.rowid == Transaction.search_rowid)
+        if ranked:
+            # FTS5 rank is bm25: lower is a better match
+            query = query.order_by(matches.c.rank)
+        return query
+
+    pattern = f"%{q}%"
+    return query.filter(or_(Transaction.description.ilike(pattern), Transaction.notes.ilike(pattern)))
@@ -1,35 +1,59 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, extract
+from sqlalchemy import func, and_, tuple_, select, case, extract, literal, null
 from fastapi import HTTPException, status
+from app.core.database import SessionLocal
+from app.core.cache import dashboard_cache
+from app.services.data_version_service import bump_data_version
+from app.core.periods import month_bounds, truncate_to_period, next_period, is_month_start, count_periods
 from app.models.transaction import Transaction
 from app.models.account import Account
 from app.models.category import Category
-from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionWithDetails
-from typing import List, Optional
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services.account_service import signed_amount, adjust_balance, apply_balance_deltas
+from app.services.balance_history_service import shift_checkpoints
+from app.services.rollup_service import record_transaction, get_period_totals
+from app.services.search_service import apply_search
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime
+import base64
+import csv
+import io
+import json
+
+# Rows fetched per round trip from the server-side cursor during exports
+EXPORT_CHUNK_SIZE = 1000
+
+# Upper bound on periods returned by one summary request (ten years of days)
+MAX_SUMMARY_PERIODS = 3700
+
+# TransactionWithDetails, field for field, selected as plain columns so list
+# pages are read as Core rows without building ORM objects or models
+TRANSACTION_DETAIL_COLUMNS = (
+    Transaction.id,
+    Transaction.user_id,
+    Transaction.account_id,
+    Transaction.category_id,
+    Transaction.type,
+    Transaction.amount,
+    Transaction.description,
+    Transaction.notes,
+    Transaction.transaction_date,
+    Transaction.created_at,
+    Transaction.updated_at,
+    Category.name.label("category_name"),
+    literal("gray").label("category_color"),
+    null().label("category_icon"),
+    Account.name.label("account_name"),
+)
+
+EXPORT_COLUMNS = [
+    "id", "transaction_date", "type", "amount", "description", "notes",
+    "category_id", "category_name", "account_id", "account_name",
+]
 
 
 def create_transaction(db: Session, user_id: str, data: TransactionCreate) -> Transaction:
     """Create a new transaction and update account balance."""
-    # Validate account belongs to user if provided
-    if data.account_id:
-        account = db.query(Account).filter(
-            Account.id == data.account_id,
-            Account.user_id == user_id
-        ).first()
-
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Account not found"
-            )
-
-        # Update account balance
-        if data.type == "income":
-            account.balance += data.amount
-        else:  # expense
-            account.balance -= data.amount
-
     # Validate category belongs to user if provided
     if data.category_id:
         category = db.query(Category).filter(
@@ -50,6 +74,18 @@ def create_transaction(db: Session, user_id: str, data: TransactionCreate) -> Tr
                 detail=f"Cannot use {category.type} category for {data.type} transaction. Please select a {data.type} category."
             )
 
+    transaction_date = data.transaction_date or datetime.now()
+
+    # Update account balance; the UPDATE also checks the account belongs to the user
+    if data.account_id:
+        delta = signed_amount(data.type, data.amount)
+        if adjust_balance(db, data.account_id, delta, user_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Account not found"
+            )
+        shift_checkpoints(db, data.account_id, transaction_date, delta)
+
     transaction = Transaction(
         user_id=user_id,
         account_id=data.account_id,
@@ -58,29 +94,50 @@ def create_transaction(db: Session, user_id: str, data: TransactionCreate) -> Tr
         amount=data.amount,
         description=data.description,
         notes=data.notes,
-        transaction_date=data.transaction_date or datetime.now()
+        transaction_date=transaction_date
     )
 
     db.add(transaction)
+    record_transaction(
+        db, user_id, transaction.category_id, transaction.type,
+        transaction.transaction_date, transaction.amount
+    )
+    bump_data_version(db, user_id, "transaction")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     db.refresh(transaction)
     return transaction
 
 
-def get_transactions(
+def encode_cursor(transaction_date: datetime, transaction_id: str) -> str:
+    """Encode a (transaction_date, id) position as an opaque page cursor."""
+    raw = f"{transaction_date.isoformat()}|{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a page cursor back into its (transaction_date, id) position."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        date_part, transaction_id = raw.split("|", 1)
+        return datetime.fromisoformat(date_part), transaction_id
+    except (ValueError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _transactions_with_details_query(
     db: Session,
     user_id: str,
-    skip: int = 0,
-    limit: int = 100,
     type: Optional[str] = None,
     category_id: Optional[str] = None,
     account_id: Optional[str] = None
-) -> List[TransactionWithDetails]:
-    """Get transactions with filters."""
+):
+    """Base query of a user's transactions as TRANSACTION_DETAIL_COLUMNS rows."""
     query = db.query(
-        Transaction,
-        Category.name.label("category_name"),
-        Account.name.label("account_name")
+        *TRANSACTION_DETAIL_COLUMNS
     ).outerjoin(
         Category, Transaction.category_id == Category.id
     ).outerjoin(
@@ -96,30 +153,66 @@ def get_transactions(
     if account_id:
         query = query.filter(Transaction.account_id == account_id)
 
-    results = query.order_by(Transaction.transaction_date.desc()).offset(skip).limit(limit).all()
-
-    # Convert to TransactionWithDetails
-    transactions = []
-    for trans, cat_name, acc_name in results:
-        trans_dict = {
-            "id": trans.id,
-            "user_id": trans.user_id,
-            "account_id": trans.account_id,
-            "category_id": trans.category_id,
-            "type": trans.type,
-            "amount": trans.amount,
-            "description": trans.description,
-            "notes": trans.notes,
-            "transaction_date": trans.transaction_date,
-            "created_at": trans.created_at,
-            "updated_at": trans.updated_at,
-            "category_name": cat_name,
-            "category_color": "gray",
-            "account_name": acc_name
-        }
-        transactions.append(TransactionWithDetails(**trans_dict))
-
-    return transactions
+    return query
+
+
+def _rows_to_dicts(rows) -> List[dict]:
+    return [row._asdict() for row in rows]
+
+
+def get_transactions(
+    db: Session,
+    user_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    type: Optional[str] = None,
+    category_id: Optional[str] = None,
+    account_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    q: Optional[str] = None
+) -> List[dict]:
+    """
+    Get transactions with filters, newest first, as TransactionWithDetails-shaped dicts.
+
+    When a cursor is given, the page starts right after the position it
+    encodes and skip is ignored, so every page costs one index range scan
+    no matter how deep the client has scrolled. q narrows the results to
+    full-text matches on description and notes.
+    """
+    query = _transactions_with_details_query(db, user_id, type, category_id, account_id)
+
+    if q:
+        query = apply_search(db, query, q)
+
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Transaction.transaction_date, Transaction.id) < tuple_(cursor_date, cursor_id)
+        )
+
+    query = query.order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+    if not cursor:
+        query = query.offset(skip)
+
+    return _rows_to_dicts(query.limit(limit).all())
+
+
+def search_transactions(
+    db: Session,
+    user_id: str,
+    q: str,
+    skip: int = 0,
+    limit: int = 50,
+    type: Optional[str] = None,
+    category_id: Optional[str] = None,
+    account_id: Optional[str] = None
+) -> List[dict]:
+    """Full-text search over description and notes, best matches first, newest first among equals."""
+    query = _transactions_with_details_query(db, user_id, type, category_id, account_id)
+    query = apply_search(db, query, q, ranked=True)
+    query = query.order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+
+    return _rows_to_dicts(query.offset(skip).limit(limit).all())
 
 
 def get_transaction(db: Session, user_id: str, transaction_id: str) -> Transaction:
@@ -163,25 +256,35 @@ def update_transaction(db: Session, user_id: str, transaction_id: str, data: Tra
                 detail=f"Cannot use {category.type} category for {transaction_type} transaction. Please select a {transaction_type} category."
             )
 
-    # If amount or type changes, need to adjust account balance
-    if (data.amount and data.amount != transaction.amount) or (data.type and data.type != transaction.type):
-        if transaction.account_id:
-            account = db.query(Account).filter(Account.id == transaction.account_id).first()
-            if account:
-                # Reverse old transaction
-                if transaction.type == "income":
-                    account.balance -= transaction.amount
-                else:
-                    account.balance += transaction.amount
+    # Move the balance effect: reverse it on the old account, apply it on the new one
+    new_account_id = data.account_id if data.account_id is not None else transaction.account_id
+    new_type = data.type if data.type is not None else transaction.type
+    new_amount = data.amount if data.amount is not None else transaction.amount
 
-                # Apply new transaction
-                new_amount = data.amount if data.amount else transaction.amount
-                new_type = data.type if data.type else transaction.type
+    deltas = {}
+    if transaction.account_id:
+        deltas[transaction.account_id] = -signed_amount(transaction.type, transaction.amount)
+    if new_account_id:
+        deltas[new_account_id] = deltas.get(new_account_id, 0.0) + signed_amount(new_type, new_amount)
 
-                if new_type == "income":
-                    account.balance += new_amount
-                else:
-                    account.balance -= new_amount
+    balances = apply_balance_deltas(db, deltas, user_id)
+    if new_account_id and new_account_id != transaction.account_id and balances.get(new_account_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found"
+        )
+
+    # Backdated changes also move the balance checkpoints after them
+    new_date = data.transaction_date if data.transaction_date is not None else transaction.transaction_date
+    old_effect = (transaction.account_id, signed_amount(transaction.type, transaction.amount), transaction.transaction_date)
+    new_effect = (new_account_id, signed_amount(new_type, new_amount), new_date)
+    if old_effect != new_effect:
+        if transaction.account_id:
+            shift_checkpoints(db, transaction.account_id, transaction.transaction_date, -old_effect[1])
+        if new_account_id:
+            shift_checkpoints(db, new_account_id, new_date, new_effect[1])
+
+    rollup_key = (transaction.category_id, transaction.type, transaction.transaction_date, transaction.amount)
 
     # Update fields
     if data.account_id is not None:
@@ -199,7 +302,15 @@ def update_transaction(db: Session, user_id: str, transaction_id: str, data: Tra
     if data.transaction_date is not None:
         transaction.transaction_date = data.transaction_date
 
+    # Move the amount between monthly rollups if category, type, month or amount changed
+    new_rollup_key = (transaction.category_id, transaction.type, transaction.transaction_date, transaction.amount)
+    if new_rollup_key != rollup_key:
+        record_transaction(db, user_id, *rollup_key, sign=-1)
+        record_transaction(db, user_id, *new_rollup_key)
+
+    bump_data_version(db, user_id, "transaction")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     db.refresh(transaction)
     return transaction
 
@@ -210,42 +321,174 @@ def delete_transaction(db: Session, user_id: str, transaction_id: str):
 
     # Adjust account balance
     if transaction.account_id:
-        account = db.query(Account).filter(Account.id == transaction.account_id).first()
-        if account:
-            if transaction.type == "income":
-                account.balance -= transaction.amount
-            else:
-                account.balance += transaction.amount
+        delta = -signed_amount(transaction.type, transaction.amount)
+        adjust_balance(db, transaction.account_id, delta)
+        shift_checkpoints(db, transaction.account_id, transaction.transaction_date, delta)
+
+    record_transaction(
+        db, user_id, transaction.category_id, transaction.type,
+        transaction.transaction_date, transaction.amount, sign=-1
+    )
 
     db.delete(transaction)
+    bump_data_version(db, user_id, "transaction")
     db.commit()
+    dashboard_cache.invalidate(user_id)
     return {"message": "Transaction deleted successfully"}
 
 
-def get_monthly_summary(db: Session, user_id: str, month: int, year: int):
-    """Get income and expense summary for a month."""
-    income = db.query(func.sum(Transaction.amount)).filter(
-        and_(
-            Transaction.user_id == user_id,
-            Transaction.type == "income",
-            extract('month', Transaction.transaction_date) == month,
-            extract('year', Transaction.transaction_date) == year
+def get_period_summaries(
+    db: Session,
+    user_id: str,
+    start: datetime,
+    end: datetime,
+    granularity: str = "month"
+) -> List[dict]:
+    """
+    Get income and expense totals for every period in [start, end).
+
+    A single conditional-aggregation query returns all periods at once;
+    periods without transactions are filled in with zeros. Ranges made of
+    whole months are answered from the monthly rollups instead of raw rows.
+
+    Raises:
+        HTTPException: If the range holds more than MAX_SUMMARY_PERIODS periods
+    """
+    if count_periods(start, end, granularity) > MAX_SUMMARY_PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too large for granularity '{granularity}'; use a larger granularity or a shorter range"
         )
-    ).scalar() or 0.0
 
-    expenses = db.query(func.sum(Transaction.amount)).filter(
-        and_(
+    group_columns = [extract('year', Transaction.transaction_date)]
+    if granularity in ("month", "day"):
+        group_columns.append(extract('month', Transaction.transaction_date))
+    if granularity == "day":
+        group_columns.append(extract('day', Transaction.transaction_date))
+
+    if granularity != "day" and is_month_start(start) and is_month_start(end):
+        rows = get_period_totals(db, user_id, start, end, granularity)
+    else:
+        rows = db.query(
+            *group_columns,
+            func.sum(case((Transaction.type == "income", Transaction.amount), else_=0.0)),
+            func.sum(case((Transaction.type == "expense", Transaction.amount), else_=0.0))
+        ).filter(
             Transaction.user_id == user_id,
-            Transaction.type == "expense",
-            extract('month', Transaction.transaction_date) == month,
-            extract('year', Transaction.transaction_date) == year
-        )
-    ).scalar() or 0.0
+            Transaction.transaction_date >= start,
+            Transaction.transaction_date < end
+        ).group_by(*group_columns).all()
+
+    totals = {
+        tuple(int(part) for part in row[:-2]): (float(row[-2] or 0.0), float(row[-1] or 0.0))
+        for row in rows
+    }
+
+    summaries = []
+    period = truncate_to_period(start, granularity)
+    while period < end:
+        key = (period.year, period.month, period.day)[:len(group_columns)]
+        income, expenses = totals.get(key, (0.0, 0.0))
+        summaries.append({
+            "period_start": period.date(),
+            "year": period.year,
+            "month": period.month if granularity != "year" else None,
+            "day": period.day if granularity == "day" else None,
+            "income": income,
+            "expenses": expenses,
+            "net": income - expenses
+        })
+        period = next_period(period, granularity)
+
+    return summaries
+
+
+def get_monthly_summary(db: Session, user_id: str, month: int, year: int):
+    """Get income and expense summary for a month."""
+    start, end = month_bounds(year, month)
+    summary = get_period_summaries(db, user_id, start, end, "month")[0]
 
     return {
         "month": month,
         "year": year,
-        "income": float(income),
-        "expenses": float(expenses),
-        "net": float(income - expenses)
+        "income": summary["income"],
+        "expenses": summary["expenses"],
+        "net": summary["net"]
     }
+
+
+def iter_transaction_export(
+    user_id: str,
+    format: str = "csv",
+    type: Optional[str] = None,
+    category_id: Optional[str] = None,
+    account_id: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Iterator[str]:
+    """
+    Stream a user's transactions as CSV or NDJSON text chunks.
+
+    Rows come from a server-side cursor EXPORT_CHUNK_SIZE at a time as plain
+    column tuples, so memory stays constant however long the history is. The
+    generator owns its session because it outlives the request dependency.
+    """
+    query = select(
+        Transaction.id,
+        Transaction.transaction_date,
+        Transaction.type,
+        Transaction.amount,
+        Transaction.description,
+        Transaction.notes,
+        Transaction.category_id,
+        Category.name,
+        Transaction.account_id,
+        Account.name
+    ).outerjoin(
+        Category, Transaction.category_id == Category.id
+    ).outerjoin(
+        Account, Transaction.account_id == Account.id
+    ).where(
+        Transaction.user_id == user_id
+    )
+
+    if type:
+        query = query.where(Transaction.type == type)
+    if category_id:
+        query = query.where(Transaction.category_id == category_id)
+    if account_id:
+        query = query.where(Transaction.account_id == account_id)
+    if start_date:
+        query = query.where(Transaction.transaction_date >= start_date)
+    if end_date:
+        query = query.where(Transaction.transaction_date < end_date)
+
+    query = query.order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=EXPORT_CHUNK_SIZE, stream_results=True))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if format == "csv":
+            writer.writerow(EXPORT_COLUMNS)
+
+        for rows in result.partitions():
+            for row in rows:
+                values = list(row)
+                values[1] = values[1].isoformat()
+                if format == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values))))
+                    buffer.write("\n")
+
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
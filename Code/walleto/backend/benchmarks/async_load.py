@@ -0,0 +1,174 @@
+"""
+Throughput of the financial read endpoints on the sync and async paths.
+
+Usage:
+    python -m benchmarks.async_load [--url postgresql://...] [--concurrency 200] [--requests 2000]
+
+Serves each endpoint twice from the real app: once through the async route
+(AsyncSession + async driver) and once through an equivalent sync `def`
+route on SessionLocal, which runs in the anyio threadpool (40 slots by
+default). Requests are driven in-process with httpx at the given
+concurrency and requests/s and latency percentiles are printed per path.
+Defaults to a throwaway SQLite file; the gap only shows against a real
+database server, so point --url at Postgres for meaningful numbers.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+ENDPOINTS = ("dashboard", "budgets", "transactions", "accounts")
+
+
+def seed(user_count: int, transactions_per_user: int) -> list:
+    """Create users with an account, a budgeted category and some transactions; return their tokens."""
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from app.core.database import SessionLocal, engine, Base
+    from app import models
+    from app.models.user import User
+    from app.models.account import Account
+    from app.models.category import Category
+    from app.models.budget import Budget
+    from app.models.transaction import Transaction
+    from app.services.auth import create_user_token
+    from app.services.rollup_service import rebuild_rollups
+
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now()
+    tokens = []
+
+    db = SessionLocal()
+    for n in range(user_count):
+        user = User(email=f"load-{time.time()}-{n}@example.com", first_name="Load", last_name=str(n))
+        db.add(user)
+        db.flush()
+        account = Account(user_id=user.id, name="Checking", type="checking", balance=1000.0)
+        category = Category(user_id=user.id, name="Groceries", type="expense")
+        db.add_all([account, category])
+        db.flush()
+        db.add(Budget(user_id=user.id, category_id=category.id, amount=500.0, month=now.month, year=now.year))
+        db.execute(insert(Transaction), [
+            {
+                "user_id": user.id,
+                "account_id": account.id,
+                "category_id": category.id,
+                "type": "expense",
+                "amount": 5.0 + i % 50,
+                "description": f"Store {i % 20}",
+                "transaction_date": now - timedelta(hours=i),
+            }
+            for i in range(transactions_per_user)
+        ])
+        db.commit()
+        tokens.append(create_user_token(user))
+
+    rebuild_rollups(db)
+    db.close()
+    return tokens
+
+
+def add_sync_routes(app):
+    """Mount the sync equivalents of the benchmarked async routes under /sync."""
+    from fastapi import APIRouter, Depends
+    from sqlalchemy.orm import Session
+    from app.core.database import get_db
+    from app.api.routes.auth import get_current_user
+    from app.services import dashboard_service, budget_service, transaction_service, account_service
+
+    router = APIRouter(prefix="/sync")
+
+    @router.get("/dashboard")
+    def dashboard(current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+        return dashboard_service.get_dashboard_data(db, current_user.id)
+
+    @router.get("/budgets")
+    def budgets(current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+        return budget_service.get_budgets(db, current_user.id)
+
+    @router.get("/transactions")
+    def transactions(current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+        return transaction_service.get_transactions(db, current_user.id, limit=100)
+
+    @router.get("/accounts")
+    def accounts(current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+        return account_service.get_accounts(db, current_user.id)
+
+    app.include_router(router)
+
+
+async def drive(app, path: str, tokens: list, concurrency: int, total: int) -> dict:
+    """Issue `total` GETs against path with at most `concurrency` in flight."""
+    import httpx
+
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    # Count server errors (e.g. pool timeouts) instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i: int):
+            nonlocal failures
+            headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "rps": total / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "failures": failures,
+    }
+
+
+async def compare(app, tokens: list, args):
+    """Run every endpoint on both paths and print one row each."""
+    print(f"{args.requests} requests per path at concurrency {args.concurrency}")
+    print(f"{'endpoint':<14}{'path':<7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for endpoint in args.endpoints:
+        for label, path in (("sync", f"/sync/{endpoint}"), ("async", f"/api/financial/{endpoint}")):
+            result = await drive(app, path, tokens, args.concurrency, args.requests)
+            print(
+                f"{endpoint:<14}{label:<7}{result['rps']:>10.1f}{result['p50']:>10.1f}"
+                f"{result['p95']:>10.1f}{result['failures']:>8}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database URL (default: temporary SQLite file)")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint and path")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=500, help="Transactions seeded per user")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'async_load.db')}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    # Measure the database path, not dashboard cache hits
+    os.environ["DASHBOARD_CACHE_TTL_SECONDS"] = "0"
+
+    from app.main import app
+
+    tokens = seed(args.users, args.transactions)
+    add_sync_routes(app)
+
+    # One event loop for every run: pooled async connections are bound to it
+    asyncio.run(compare(app, tokens, args))
+
+
+if __name__ == "__main__":
+    main()
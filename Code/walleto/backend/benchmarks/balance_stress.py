@@ -0,0 +1,106 @@
+"""
+Concurrency stress check for account balance updates.
+
+Usage:
+    python -m benchmarks.balance_stress [--url postgresql://...] [--threads 16] [--writes 50]
+
+Many threads create, update and delete transactions against one account
+at the same time through the real transaction service, then the final
+balance is compared with the expected sum. Exits non-zero on a lost update.
+Defaults to a throwaway SQLite file; point --url at Postgres for a real
+row-locking run.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database URL (default: temporary SQLite file)")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=50, help="Transactions created per thread")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'balance_stress.db')}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    from sqlalchemy import event
+    from app.core.database import SessionLocal, engine, Base
+    from app import models
+    from app.models.user import User
+    from app.models.account import Account
+    from app.schemas.transaction import TransactionCreate, TransactionUpdate
+    from app.services import transaction_service
+
+    if engine.dialect.name == "sqlite":
+        # Let SQLite writers queue on the database lock instead of failing fast
+        @event.listens_for(engine, "connect")
+        def set_busy_timeout(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA busy_timeout = 30000")
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    user = User(email=f"stress-{time.time()}@example.com", first_name="Stress", last_name="Test")
+    db.add(user)
+    db.flush()
+    account = Account(user_id=user.id, name="Stress", type="checking", balance=0.0)
+    db.add(account)
+    db.commit()
+    user_id, account_id = user.id, account.id
+    db.close()
+
+    errors = []
+
+    def worker(index: int):
+        session = SessionLocal()
+        try:
+            for i in range(args.writes):
+                created = transaction_service.create_transaction(session, user_id, TransactionCreate(
+                    account_id=account_id, type="income", amount=10.0, description=f"stress {index}-{i}"
+                ))
+                # Every third write is flipped to a 3.0 expense, every fifth is deleted
+                if i % 3 == 0:
+                    transaction_service.update_transaction(session, user_id, created.id, TransactionUpdate(
+                        type="expense", amount=3.0
+                    ))
+                if i % 5 == 0:
+                    transaction_service.delete_transaction(session, user_id, created.id)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    expected_per_thread = sum(
+        0.0 if i % 5 == 0 else (-3.0 if i % 3 == 0 else 10.0)
+        for i in range(args.writes)
+    )
+    expected = expected_per_thread * args.threads
+
+    db = SessionLocal()
+    actual = db.query(Account.balance).filter(Account.id == account_id).scalar()
+    db.close()
+
+    print(f"{args.threads} threads x {args.writes} writes in {elapsed:.2f}s")
+    print(f"expected balance {expected:.2f}, actual {actual:.2f}")
+    if errors:
+        print(f"{len(errors)} worker errors, first: {errors[0]!r}")
+
+    if errors or abs(actual - expected) > 1e-6:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
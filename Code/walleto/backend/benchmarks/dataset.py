@@ -0,0 +1,72 @@
+"""
+Seed a reproducible benchmark dataset: users x accounts x transactions.
+
+Imported by the benchmarks after DATABASE_URL is set. Rows come from
+app.scripts.generate_data, so the same --seed and sizes always produce the
+same ids and values and runs against fresh databases are comparable across
+versions. History ends today, so the current-month dashboard and budgets
+have data.
+"""
+from dataclasses import asdict, dataclass
+
+EMAIL_PREFIX = "bench"
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    users: int = 10
+    accounts: int = 3  # per user
+    transactions: int = 2000  # per user
+    months: int = 12
+    seed: int = 42
+
+    def describe(self) -> dict:
+        return asdict(self)
+
+    def generator_spec(self):
+        from app.scripts.generate_data import GeneratorSpec
+
+        return GeneratorSpec(
+            users=self.users,
+            transactions=self.transactions,
+            months=self.months,
+            seed=self.seed,
+            accounts=self.accounts,
+            email_prefix=EMAIL_PREFIX,
+        )
+
+
+def bench_email(spec: DatasetSpec, n: int) -> str:
+    from app.scripts.generate_data import user_email
+
+    return user_email(spec.generator_spec(), n)
+
+
+def seed(spec: DatasetSpec) -> list:
+    """
+    Create the dataset in the configured database; return one token per user.
+
+    Users already present (from an earlier run on the same database) are
+    kept as they are.
+    """
+    from app.scripts.generate_data import generate
+
+    generate(spec.generator_spec())
+    return tokens_for_existing(spec)
+
+
+def tokens_for_existing(spec: DatasetSpec) -> list:
+    """Tokens of an already seeded dataset (for --skip-seed against a reused database)."""
+    from app.core.database import SessionLocal
+    from app.services.auth import create_user_token, get_user_by_email
+
+    db = SessionLocal()
+    try:
+        users = [get_user_by_email(db, bench_email(spec, n)) for n in range(spec.users)]
+    finally:
+        db.close()
+
+    missing = [n for n, user in enumerate(users) if user is None]
+    if missing:
+        raise SystemExit(f"{len(missing)} benchmark users are missing; run without --skip-seed first")
+    return [create_user_token(user) for user in users]
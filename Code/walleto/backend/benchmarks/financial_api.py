@@ -0,0 +1,246 @@
+"""
+Latency, throughput and queries per request of the financial read endpoints.
+
+Usage:
+    python -m benchmarks.financial_api [--url postgresql://...] [--json out.json] [--baseline old.json]
+    python -m benchmarks.financial_api --base-url http://localhost:8000 --url <the server's DATABASE_URL>
+
+Seeds a reproducible dataset (see benchmarks.dataset) and drives each
+endpoint with --requests GETs at --concurrency, after --warmup untimed
+ones. By default the real app runs in-process behind httpx's ASGI
+transport and every SQL statement is counted; with --base-url requests go
+over HTTP to a running server instead (use the server's database and
+SECRET_KEY; queries per request then come from the Server-Timing header,
+so the server needs QUERY_METRICS_ENABLED). --json writes a
+report to diff between versions; --baseline prints the change against
+an earlier report. The dashboard cache is disabled in-process so the
+database path is what gets measured.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ENDPOINTS = {
+    "dashboard": "/api/financial/dashboard",
+    "transactions": "/api/financial/transactions?limit=100",
+    "budgets": "/api/financial/budgets",
+    "accounts": "/api/financial/accounts",
+    "categories": "/api/financial/categories",
+}
+DEFAULT_ENDPOINTS = ["dashboard", "transactions", "budgets"]
+
+# The app's Server-Timing entry for the request's SQL (app.core.query_metrics)
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+class QueryCounter:
+    """Count statements on the app's engines (in-process runs only)."""
+
+    def __init__(self):
+        from sqlalchemy import event
+        from app.core.database import engine, async_engine
+
+        self.count = 0
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def drive(client, path: str, tokens: list, concurrency: int, total: int) -> dict:
+    """Issue `total` GETs against path with at most `concurrency` in flight."""
+    latencies = []
+    db_ms = []
+    db_queries = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+            timing = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+            if timing:
+                db_ms.append(float(timing.group(1)))
+                db_queries.append(int(timing.group(2)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "latency_ms": {
+            "p50": round(quantiles[49] * 1000, 2),
+            "p95": round(quantiles[94] * 1000, 2),
+            "p99": round(quantiles[98] * 1000, 2),
+            "mean": round(statistics.fmean(latencies) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+        },
+        # Per request, as reported by the server; None if it sent no Server-Timing
+        "db_ms_mean": round(statistics.fmean(db_ms), 2) if db_ms else None,
+        "server_queries_per_request": round(statistics.fmean(db_queries), 2) if db_queries else None,
+    }
+
+
+async def run(args, tokens: list, counter) -> dict:
+    import httpx
+
+    if args.base_url:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=None, limits=limits)
+    else:
+        from app.main import app
+        # Count server errors (e.g. pool timeouts) instead of aborting the run
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+
+    results = {}
+    async with client:
+        for name in args.endpoints:
+            path = ENDPOINTS[name]
+            await drive(client, path, tokens, args.concurrency, args.warmup)
+            queries_before = counter.count if counter else 0
+            result = await drive(client, path, tokens, args.concurrency, args.requests)
+            result["queries_per_request"] = (
+                round((counter.count - queries_before) / args.requests, 2) if counter
+                else result["server_queries_per_request"]
+            )
+            results[name] = result
+    return results
+
+
+def print_report(report: dict, baseline: dict = None):
+    meta = report["meta"]
+    print(f"{meta['mode']} run on {meta['database']}, {meta['requests']} requests per endpoint at concurrency {meta['concurrency']}")
+    print(f"{'endpoint':<14}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'db ms':>9}{'errors':>8}")
+    for name, result in report["results"].items():
+        latency = result["latency_ms"]
+        queries = result["queries_per_request"]
+        db_ms = result.get("db_ms_mean")
+        print(
+            f"{name:<14}{result['throughput_rps']:>9.1f}{latency['p50']:>9.1f}{latency['p95']:>9.1f}"
+            f"{latency['p99']:>9.1f}{'-' if queries is None else queries:>9}"
+            f"{'-' if db_ms is None else db_ms:>9}{result['errors']:>8}"
+        )
+
+    if not baseline:
+        return
+    print(f"\nchange vs baseline {baseline['meta'].get('git_commit')} (negative latency is faster)")
+    print(f"{'endpoint':<14}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+    for name, result in report["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+
+        def change(new, before):
+            if new is None or not before:
+                return "-"
+            return f"{(new - before) / before * 100:+.0f}%"
+
+        print(
+            f"{name:<14}{change(result['throughput_rps'], old['throughput_rps']):>9}"
+            + "".join(
+                f"{change(result['latency_ms'][q], old['latency_ms'][q]):>9}" for q in ("p50", "p95", "p99")
+            )
+            + f"{change(result['queries_per_request'], old.get('queries_per_request')):>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database URL (default: temporary SQLite file)")
+    parser.add_argument("--base-url", help="Drive a running server over HTTP instead of the app in-process")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=DEFAULT_ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500, help="Timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed requests per endpoint")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--accounts", type=int, default=3, help="Accounts per user")
+    parser.add_argument("--transactions", type=int, default=2000, help="Transactions per user")
+    parser.add_argument("--months", type=int, default=12, help="History the transactions span")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse a dataset seeded earlier with the same sizes")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Report from an earlier run to compare against")
+    args = parser.parse_args()
+
+    if args.url:
+        os.environ["DATABASE_URL"] = args.url
+    elif not args.base_url:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'financial_api.db')}"
+    if not args.base_url:
+        # The in-process app signs and checks its own tokens
+        os.environ.setdefault("SECRET_KEY", "benchmark")
+        os.environ["DASHBOARD_CACHE_TTL_SECONDS"] = "0"
+
+    from sqlalchemy.engine import make_url
+    from app.core.config import settings
+    from benchmarks.dataset import DatasetSpec, seed, tokens_for_existing
+
+    spec = DatasetSpec(
+        users=args.users, accounts=args.accounts, transactions=args.transactions, months=args.months, seed=args.seed
+    )
+    started = time.perf_counter()
+    tokens = tokens_for_existing(spec) if args.skip_seed else seed(spec)
+    print(f"Dataset ready in {time.perf_counter() - started:.1f}s: {spec.describe()}", file=sys.stderr)
+
+    counter = None if args.base_url else QueryCounter()
+    results = asyncio.run(run(args, tokens, counter))
+
+    report = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "mode": "external" if args.base_url else "in-process",
+            "database": make_url(settings.DATABASE_URL).get_backend_name(),
+            "python": platform.python_version(),
+            "dataset": spec.describe(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
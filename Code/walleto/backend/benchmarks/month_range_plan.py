@@ -0,0 +1,115 @@
+"""
+Compare query plans and timings for monthly sums filtered with
+extract(month/year) versus half-open transaction_date ranges.
+
+Usage:
+    python -m benchmarks.month_range_plan [--url sqlite:///bench.db] [--rows 200000]
+
+Seeds one user with --rows transactions spread over several years into the
+given database (a throwaway SQLite file by default), then prints the plan
+and average latency of both predicate styles.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine, insert, select, func, and_, extract, text
+
+from app.core.database import Base
+from app.core.periods import month_bounds
+from app import models
+from app.models.transaction import Transaction
+from app.models.user import User
+
+
+def seed(engine, rows: int) -> str:
+    """Create the schema and insert `rows` transactions for one user (plus noise users)."""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    user_ids = [str(uuid.uuid4()) for _ in range(5)]
+    start = datetime(2020, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": user_id, "email": f"bench{i}@example.com", "first_name": "Bench", "last_name": str(i)}
+            for i, user_id in enumerate(user_ids)
+        ])
+
+        batch = []
+        for i in range(rows):
+            batch.append({
+                "id": str(uuid.uuid4()),
+                "user_id": user_ids[0] if i % 2 == 0 else rng.choice(user_ids[1:]),
+                "type": "income" if rng.random() < 0.1 else "expense",
+                "amount": round(rng.uniform(1, 500), 2),
+                "description": f"Merchant {rng.randint(1, 500)}",
+                "transaction_date": start + timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 5)),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Transaction), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Transaction), batch)
+
+    return user_ids[0]
+
+
+def build_queries(user_id: str, year: int, month: int) -> dict:
+    start, end = month_bounds(year, month)
+    base = [Transaction.user_id == user_id, Transaction.type == "expense"]
+    return {
+        "extract": select(func.sum(Transaction.amount)).where(and_(
+            *base,
+            extract('month', Transaction.transaction_date) == month,
+            extract('year', Transaction.transaction_date) == year
+        )),
+        "range": select(func.sum(Transaction.amount)).where(and_(
+            *base,
+            Transaction.transaction_date >= start,
+            Transaction.transaction_date < end
+        )),
+    }
+
+
+def explain(conn, query) -> str:
+    compiled = query.compile(conn, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    rows = conn.execute(text(prefix + str(compiled))).all()
+    return "\n".join("    " + " ".join(str(col) for col in row) for row in rows)
+
+
+def time_query(conn, query, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(query).scalar()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database URL (default: temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'month_range.db')}"
+    engine = create_engine(url)
+
+    print(f"Seeding {args.rows} transactions into {url} ...")
+    user_id = seed(engine, args.rows)
+
+    with engine.connect() as conn:
+        for name, query in build_queries(user_id, 2023, 6).items():
+            print(f"\n[{name}] {time_query(conn, query, args.repeat):.2f} ms avg")
+            print(explain(conn, query))
+
+
+if __name__ == "__main__":
+    main()
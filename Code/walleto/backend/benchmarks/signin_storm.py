@@ -0,0 +1,123 @@
+"""
+Event-loop latency during a storm of password sign-ins.
+
+Usage:
+    python -m benchmarks.signin_storm [--signins 100] [--concurrency 10] [--rounds 12]
+
+Fires --signins concurrent POST /api/auth/signin requests in-process while
+a heartbeat task measures how late the event loop wakes it up, the delay
+every other request on the worker would see. The storm runs twice: once
+through the real route (a threadpool route awaiting bcrypt in the hashing
+process pool) and once through an async copy that calls the sync
+authenticate_user inline on the event loop.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+HEARTBEAT_SECONDS = 0.01
+
+
+async def heartbeat(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        lags.append(time.perf_counter() - started - HEARTBEAT_SECONDS)
+
+
+async def storm(app, path: str, signins: int, concurrency: int) -> dict:
+    import httpx
+
+    lags = []
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+    body = {"email": "storm@example.com", "password": "storm-password"}
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one():
+            async with semaphore:
+                response = await client.post(path, json=body)
+                return response.status_code
+
+        beat = asyncio.create_task(heartbeat(lags, stop))
+        started = time.perf_counter()
+        codes = await asyncio.gather(*(one() for _ in range(signins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await beat
+
+    quantiles = statistics.quantiles(lags, n=100)
+    return {
+        "rps": signins / elapsed,
+        "lag_p50": quantiles[49] * 1000,
+        "lag_p99": quantiles[98] * 1000,
+        "lag_max": max(lags) * 1000,
+        "errors": sum(1 for code in codes if code != 200),
+    }
+
+
+async def compare(app, args):
+    print(f"{args.signins} sign-ins at concurrency {args.concurrency}, bcrypt cost {args.rounds}")
+    print(f"{'mode':<10}{'signins/s':>11}{'loop lag p50 ms':>17}{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+    for mode, path in (("inline", "/bench/signin-inline"), ("pool", "/api/auth/signin")):
+        result = await storm(app, path, args.signins, args.concurrency)
+        print(
+            f"{mode:<10}{result['rps']:>11.1f}{result['lag_p50']:>17.1f}"
+            f"{result['lag_p99']:>10.1f}{result['lag_max']:>10.1f}{result['errors']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--signins", type=int, default=100)
+    # Keep below the pool size: the inline route holds its connection until
+    # the response is sent, as the old routes did
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=2, help="Hashing pool processes")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'signin_storm.db')}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.update({
+        "BCRYPT_ROUNDS": str(args.rounds),
+        "PASSWORD_HASH_WORKERS": str(args.workers),
+        "PASSWORD_HASH_MAX_PENDING": str(args.signins),
+        "SIGNIN_PER_EMAIL": str(args.signins * 2),
+        "SIGNIN_PER_IP": str(args.signins * 2),
+    })
+
+    from fastapi import Depends
+    from sqlalchemy.orm import Session
+    from app.main import app
+    from app.core.database import Base, engine, SessionLocal, get_db
+    from app.core.hashing import password_hasher
+    from app.schemas.user import UserCreate, UserLogin
+    from app.services.auth import create_user, authenticate_user, create_user_token
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    create_user(db, UserCreate(email="storm@example.com", password="storm-password", first_name="Storm", last_name="Test"))
+    db.close()
+
+    @app.post("/bench/signin-inline")
+    async def signin_inline(credentials: UserLogin, db: Session = Depends(get_db)):
+        user = authenticate_user(db, credentials)
+        return {"access_token": create_user_token(user), "token_type": "bearer"}
+
+    # Pay for process start-up before measuring
+    password_hasher.start()
+    asyncio.run(password_hasher.hash("warm-up"))
+
+    try:
+        asyncio.run(compare(app, args))
+    finally:
+        password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
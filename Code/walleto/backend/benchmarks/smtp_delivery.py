@@ -0,0 +1,128 @@
+"""
+OTP email delivery throughput against a local SMTP stand-in.
+
+Usage:
+    pip install aiosmtpd
+    python -m benchmarks.smtp_delivery [--messages 500] [--workers 4] [--latency-ms 20]
+
+Starts an aiosmtpd server on localhost that waits --latency-ms on every
+connection handshake and message, like a remote relay would. Then it sends
+the same OTP emails twice: once the old way, opening a fresh connection
+for each message inline, and once through the background delivery queue.
+It prints the time callers spend per message and the end-to-end throughput
+for each.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+
+
+def start_server(port: int, latency: float):
+    """Run an aiosmtpd server with artificial latency; returns (controller, received counter)."""
+    from aiosmtpd.controller import Controller
+
+    received = {"count": 0}
+    lock = threading.Lock()
+
+    class SlowHandler:
+        async def handle_EHLO(self, server, session, envelope, hostname, responses):
+            await asyncio.sleep(latency)
+            session.host_name = hostname
+            return responses
+
+        async def handle_DATA(self, server, session, envelope):
+            await asyncio.sleep(latency)
+            with lock:
+                received["count"] += 1
+            return "250 Message accepted for delivery"
+
+    controller = Controller(SlowHandler(), hostname="127.0.0.1", port=port)
+    controller.start()
+    return controller, received
+
+
+def wait_for(received: dict, expected: int, timeout: float = 300.0):
+    deadline = time.monotonic() + timeout
+    while received["count"] < expected and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4, help="Delivery workers (and inline senders)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Server delay per handshake and per message")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.update({
+        "SMTP_SERVER": "127.0.0.1",
+        "SMTP_PORT": str(args.port),
+        "SMTP_USE_TLS": "false",
+        "SMTP_USERNAME": "",
+        "SMTP_FROM": "bench@walleto.local",
+        "SMTP_WORKERS": str(args.workers),
+        "SMTP_QUEUE_MAX": str(args.messages),
+    })
+
+    import smtplib
+    from app.services.email import build_otp_message, send_otp_email, email_queue
+
+    controller, received = start_server(args.port, args.latency_ms / 1000)
+    recipients = [f"user{i}@example.com" for i in range(args.messages)]
+
+    # Old behaviour: the caller opens a connection and sends inline
+    inline_latencies = []
+
+    def inline_sender(batch):
+        for recipient in batch:
+            started = time.perf_counter()
+            with smtplib.SMTP("127.0.0.1", args.port) as server:
+                server.send_message(build_otp_message(recipient, "123456", "signin"))
+            inline_latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=inline_sender, args=(recipients[n::args.workers],))
+        for n in range(args.workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    inline_elapsed = time.perf_counter() - started
+
+    # Queue: the caller only enqueues; workers reuse their connections
+    received["count"] = 0
+    email_queue.start()
+    queued_latencies = []
+    started = time.perf_counter()
+    for recipient in recipients:
+        enqueued = time.perf_counter()
+        send_otp_email(recipient, "123456", "signin")
+        queued_latencies.append(time.perf_counter() - enqueued)
+    wait_for(received, args.messages)
+    queued_elapsed = time.perf_counter() - started
+    email_queue.stop()
+    controller.stop()
+
+    print(f"{args.messages} messages, {args.workers} senders, {args.latency_ms:.0f} ms server latency")
+    print(f"{'mode':<10}{'caller p50 ms':>15}{'caller p95 ms':>15}{'msgs/s':>10}{'connections':>13}")
+    for mode, latencies, elapsed, connections in (
+        ("inline", inline_latencies, inline_elapsed, args.messages),
+        ("queued", queued_latencies, queued_elapsed, email_queue.stats()["connections"]),
+    ):
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"{mode:<10}{quantiles[49] * 1000:>15.2f}{quantiles[94] * 1000:>15.2f}"
+            f"{args.messages / elapsed:>10.1f}{connections:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+# app.core.database builds its engines from settings at import time
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+from app.core.database import Base, SessionLocal, engine
+from app import models
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
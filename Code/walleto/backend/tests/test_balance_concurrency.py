@@ -0,0 +1,70 @@
+import threading
+from sqlalchemy import event
+from app.core.database import SessionLocal, engine
+from app.models.account import Account
+from app.models.user import User
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services import transaction_service
+
+THREADS = 8
+WRITES = 15  # per thread
+
+
+def _account(db) -> Account:
+    user = User(email="balance@example.com", first_name="Balance", last_name="Test")
+    db.add(user)
+    db.flush()
+    account = Account(user_id=user.id, name="Checking", type="checking", balance=0.0)
+    db.add(account)
+    db.commit()
+    return account
+
+
+def _set_busy_timeout(dbapi_connection, connection_record):
+    # Let SQLite writers queue on the database lock instead of failing fast
+    dbapi_connection.execute("PRAGMA busy_timeout = 30000")
+
+
+def _writes(user_id: str, account_id: str, index: int, errors: list):
+    session = SessionLocal()
+    try:
+        for i in range(WRITES):
+            created = transaction_service.create_transaction(session, user_id, TransactionCreate(
+                account_id=account_id, type="income", amount=10.0, description=f"concurrent {index}-{i}"
+            ))
+            # Every third write is flipped to a 3.0 expense, every fifth is deleted
+            if i % 3 == 0:
+                transaction_service.update_transaction(session, user_id, created.id, TransactionUpdate(
+                    type="expense", amount=3.0
+                ))
+            if i % 5 == 0:
+                transaction_service.delete_transaction(session, user_id, created.id)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        session.close()
+
+
+def test_concurrent_writes_keep_the_balance(db):
+    account = _account(db)
+    user_id, account_id = account.user_id, account.id
+    errors = []
+
+    engine.dispose()
+    event.listen(engine, "connect", _set_busy_timeout)
+    try:
+        threads = [threading.Thread(target=_writes, args=(user_id, account_id, n, errors)) for n in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        event.remove(engine, "connect", _set_busy_timeout)
+
+    expected = THREADS * sum(
+        0.0 if i % 5 == 0 else (-3.0 if i % 3 == 0 else 10.0)
+        for i in range(WRITES)
+    )
+    db.expire_all()
+    assert not errors
+    assert db.query(Account.balance).filter(Account.id == account_id).scalar() == expected
@@ -0,0 +1,44 @@
+from datetime import datetime
+from sqlalchemy import event
+from app.core.database import engine
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.user import User
+from app.services.budget_service import get_budgets
+
+
+def _user_with_budgets(db, count: int) -> str:
+    now = datetime.now()
+    user = User(email=f"budgets-{count}@example.com", first_name="Budget", last_name="Test")
+    db.add(user)
+    db.flush()
+    for i in range(count):
+        category = Category(user_id=user.id, name=f"Category {i}", type="expense")
+        db.add(category)
+        db.flush()
+        db.add(Budget(user_id=user.id, category_id=category.id, amount=100.0, month=now.month, year=now.year))
+    db.commit()
+    return user.id
+
+
+def _count_queries(db, user_id: str) -> int:
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        budgets = get_budgets(db, user_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert budgets
+    return len(statements)
+
+
+def test_budget_queries_do_not_grow_with_budgets(db):
+    one = _user_with_budgets(db, 1)
+    many = _user_with_budgets(db, 25)
+
+    assert len(get_budgets(db, many)) == 25
+    assert _count_queries(db, one) == _count_queries(db, many)
@@ -0,0 +1,40 @@
+from datetime import datetime
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.import_service import StatementRow, import_statement
+
+COFFEE = StatementRow(transaction_date=datetime(2024, 3, 4), amount=-3.50, description="Coffee")
+LUNCH = StatementRow(transaction_date=datetime(2024, 3, 4), amount=-12.00, description="Lunch")
+
+
+def _account(db) -> Account:
+    user = User(email="import@example.com", first_name="Import", last_name="Test")
+    db.add(user)
+    db.flush()
+    account = Account(user_id=user.id, name="Checking", type="checking", balance=100.0)
+    db.add(account)
+    db.commit()
+    return account
+
+
+def test_identical_rows_in_one_statement_are_all_imported(db):
+    account = _account(db)
+
+    result = import_statement(db, account.user_id, account.id, [COFFEE, COFFEE, LUNCH])
+
+    assert (result["imported"], result["duplicates"]) == (3, 0)
+    assert result["balance"] == 100.0 - 3.50 - 3.50 - 12.00
+    assert db.query(Transaction).filter(Transaction.account_id == account.id).count() == 3
+
+
+def test_reimported_statement_skips_rows_already_stored(db):
+    account = _account(db)
+    import_statement(db, account.user_id, account.id, [COFFEE, COFFEE])
+
+    # Same statement again, plus a third coffee that wasn't in the first one
+    result = import_statement(db, account.user_id, account.id, [COFFEE, COFFEE, COFFEE, LUNCH])
+
+    assert (result["imported"], result["duplicates"]) == (2, 2)
+    assert result["balance"] == 100.0 - 3 * 3.50 - 12.00
+    assert db.query(Transaction).filter(Transaction.account_id == account.id).count() == 4
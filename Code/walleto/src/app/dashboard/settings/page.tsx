@@ -45,7 +45,8 @@ export default function SettingsPage() {
       await updateProfile({
         username: profileData.username,
         nickname: profileData.nickname,
-        profilePicture: profileImage || undefined,
+        // An empty string removes the picture
+        profilePicture: profileImage || '',
         birthdate: profileData.birthdate || undefined,
         secondaryEmail: profileData.secondaryEmail || undefined,
         phoneNumber: profileData.phoneNumber || undefined,
@@ -208,6 +209,18 @@ export default function SettingsPage() {
                 className="hidden"
               />
               <p className="text-sm text-gray-500 mt-2">Click to upload profile picture</p>
+              {profileImage && (
+                <button
+                  type="button"
+                  onClick={() => {
+                    setProfileImage(null);
+                    if (fileInputRef.current) fileInputRef.current.value = '';
+                  }}
+                  className="text-sm text-red-600 hover:text-red-700 mt-1"
+                >
+                  Remove picture
+                </button>
+              )}
             </div>
 
             {/* Basic Profile Fields */}
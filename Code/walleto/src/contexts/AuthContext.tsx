@@ -1,6 +1,6 @@
 'use client';
 
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useRef } from 'react';
 import { api } from '@/lib/api';
 
 interface User {
@@ -39,6 +39,33 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
   const [user, setUser] = useState<User | null>(null);
   const [loading, setLoading] = useState(true);
 
+  // The avatar's object URL and the avatar_url it was loaded from
+  const avatar = useRef<{ source: string | null; objectUrl?: string }>({ source: null });
+
+  const releaseAvatar = () => {
+    if (avatar.current.objectUrl) URL.revokeObjectURL(avatar.current.objectUrl);
+    avatar.current = { source: null };
+  };
+
+  // Object URL for the user's avatar; the previous one is revoked when it changes
+  const loadAvatar = async (avatarUrl: string | null) => {
+    if (avatarUrl && avatarUrl === avatar.current.source) return avatar.current.objectUrl;
+
+    let objectUrl: string | undefined;
+    if (avatarUrl) {
+      try {
+        objectUrl = await api.getAvatarObjectUrl(avatarUrl);
+      } catch {
+        objectUrl = undefined;
+      }
+    }
+    releaseAvatar();
+    avatar.current = { source: objectUrl ? avatarUrl : null, objectUrl };
+    return objectUrl;
+  };
+
+  useEffect(() => releaseAvatar, []);
+
   // Load user from backend on mount if token exists
   useEffect(() => {
     const loadUser = async () => {
@@ -53,7 +80,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
             lastName: userData.last_name,
             username: userData.username || undefined,
             nickname: userData.nickname || undefined,
-            profilePicture: userData.profile_picture || undefined,
+            profilePicture: await loadAvatar(userData.avatar_url),
             birthdate: userData.birthdate || undefined,
             secondaryEmail: userData.secondary_email || undefined,
             phoneNumber: userData.phone_number || undefined,
@@ -95,7 +122,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
       lastName: userData.last_name,
       username: userData.username || undefined,
       nickname: userData.nickname || undefined,
-      profilePicture: userData.profile_picture || undefined,
+      profilePicture: await loadAvatar(userData.avatar_url),
       birthdate: userData.birthdate || undefined,
       secondaryEmail: userData.secondary_email || undefined,
       phoneNumber: userData.phone_number || undefined,
@@ -123,7 +150,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
       lastName: userData.last_name,
       username: userData.username || undefined,
       nickname: userData.nickname || undefined,
-      profilePicture: userData.profile_picture || undefined,
+      profilePicture: await loadAvatar(userData.avatar_url),
       birthdate: userData.birthdate || undefined,
       secondaryEmail: userData.secondary_email || undefined,
       phoneNumber: userData.phone_number || undefined,
@@ -143,6 +170,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
 
   const signOut = () => {
     localStorage.removeItem('walleto_token');
+    releaseAvatar();
     setUser(null);
   };
 
@@ -158,7 +186,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
           lastName: userData.last_name,
           username: userData.username || undefined,
           nickname: userData.nickname || undefined,
-          profilePicture: userData.profile_picture || undefined,
+          profilePicture: await loadAvatar(userData.avatar_url),
           birthdate: userData.birthdate || undefined,
           secondaryEmail: userData.secondary_email || undefined,
           phoneNumber: userData.phone_number || undefined,
@@ -172,6 +200,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
       } catch (error) {
         // Token is invalid/expired - silently remove it
         localStorage.removeItem('walleto_token');
+        releaseAvatar();
         setUser(null);
       }
     }
@@ -195,7 +224,10 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
 
     if (data.username !== undefined) updateData.username = data.username;
     if (data.nickname !== undefined) updateData.nickname = data.nickname;
-    if (data.profilePicture !== undefined) updateData.profile_picture = data.profilePicture;
+    // New uploads are data: URLs and '' removes the picture; the current one is a blob: URL
+    if (data.profilePicture === '' || data.profilePicture?.startsWith('data:')) {
+      updateData.profile_picture = data.profilePicture;
+    }
     if (data.birthdate !== undefined) updateData.birthdate = data.birthdate;
     if (data.secondaryEmail !== undefined) updateData.secondary_email = data.secondaryEmail;
     if (data.phoneNumber !== undefined) updateData.phone_number = data.phoneNumber;
@@ -215,7 +247,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
       lastName: userData.last_name,
       username: userData.username || undefined,
       nickname: userData.nickname || undefined,
-      profilePicture: userData.profile_picture || undefined,
+      profilePicture: await loadAvatar(userData.avatar_url),
       birthdate: userData.birthdate || undefined,
       secondaryEmail: userData.secondary_email || undefined,
       phoneNumber: userData.phone_number || undefined,
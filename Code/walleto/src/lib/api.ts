@@ -83,6 +83,21 @@ class ApiClient {
     );
   }
 
+  // The avatar endpoint needs the bearer token, which <img> can't send,
+  // so load it into an object URL
+  async getAvatarObjectUrl(avatarUrl: string): Promise<string> {
+    const token = this.getToken();
+    const response = await fetch(`${this.baseUrl}${avatarUrl}`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
+
+    if (!response.ok) {
+      throw new Error('Failed to load profile picture');
+    }
+
+    return URL.createObjectURL(await response.blob());
+  }
+
   async getCurrentUser() {
     return this.request<{
       id: string;
@@ -91,7 +106,7 @@ class ApiClient {
       last_name: string;
       username: string | null;
       nickname: string | null;
-      profile_picture: string | null;
+      avatar_url: string | null;
       birthdate: string | null;
       secondary_email: string | null;
       phone_number: string | null;
@@ -127,7 +142,7 @@ class ApiClient {
       last_name: string;
       username: string | null;
       nickname: string | null;
-      profile_picture: string | null;
+      avatar_url: string | null;
       birthdate: string | null;
       secondary_email: string | null;
       phone_number: string | null;